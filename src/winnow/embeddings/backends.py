@@ -0,0 +1,184 @@
+"""
+Pluggable retrieval backends for the embedding sweep.
+
+Both backends take precomputed embeddings (see embedding_cache.py) and return
+results in the same shape `test_model` always has: `{"query": str, "match": [ids]}`.
+`query_batch` embeds a whole query set per encoder call and searches it at once.
+
+- ChromaBackend: wraps a Chroma collection (HNSW, approximate, over HTTP).
+- NumpyBackend: brute-force exact search over a contiguous float32 matrix,
+  in-process. All queries are scored with a single matrix multiply and top-k is
+  selected with `argpartition`. Doubles as the exact-recall baseline for Chroma.
+"""
+
+import chromadb
+import numpy as np
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Callable, Literal, Optional, Sequence
+
+Space = Literal["l2", "cosine", "ip"]
+
+
+class RetrievalBackend(ABC):
+    """
+    Index (ids, embeddings), then search with query embeddings.
+    """
+
+    name: str = "backend"
+
+    @abstractmethod
+    def index(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Optional[Sequence[str]] = None,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def search(
+        self, query_embeddings: np.ndarray, k: int = 10
+    ) -> tuple[list[list[str]], list[list[float]]]:
+        """
+        Returns (ids, distances) per query, best first. Lower distance is better.
+        """
+        pass
+
+    def query(
+        self, queries: Sequence[str], query_embeddings: np.ndarray, k: int = 10
+    ) -> list[dict]:
+        """
+        Search and package results in the usual {"query", "match"} shape, plus
+        "scores" (distances, lower is better) and "latency" (seconds per query,
+        amortized over the batch).
+        """
+        start = perf_counter()
+        ids, distances = self.search(query_embeddings, k=k)
+        latency = (perf_counter() - start) / max(len(queries), 1)
+        return [
+            {"query": query, "match": match, "scores": scores, "latency": latency}
+            for query, match, scores in zip(queries, ids, distances)
+        ]
+
+    def query_batch(
+        self,
+        queries: Sequence[str],
+        encode: Callable[[list[str]], Sequence],
+        k: int = 10,
+        chunk_size: int = 1024,
+    ) -> list[dict]:
+        """
+        Embed and search a whole query set: one encoder call and one search per
+        chunk of `chunk_size` queries (so the 32 probes are a single round trip,
+        and a labelled set of thousands doesn't have to fit in one forward pass).
+        """
+        results: list[dict] = []
+        for i in range(0, len(queries), chunk_size):
+            chunk = list(queries[i : i + chunk_size])
+            start = perf_counter()
+            query_embeddings = np.asarray(encode(chunk), dtype=np.float32)
+            encode_latency = (perf_counter() - start) / len(chunk)
+            for result in self.query(chunk, query_embeddings, k=k):
+                result["latency"] += encode_latency
+                results.append(result)
+        return results
+
+
+class ChromaBackend(RetrievalBackend):
+    """
+    Thin wrapper so a Chroma collection can be swapped for the exact engine.
+    """
+
+    name = "chroma"
+
+    def __init__(self, collection: chromadb.Collection, batch_size: int = 100):
+        self.collection = collection
+        self.batch_size = batch_size
+
+    def index(self, ids, embeddings, documents=None) -> None:
+        for i in range(0, len(ids), self.batch_size):
+            self.collection.upsert(
+                ids=list(ids[i : i + self.batch_size]),
+                embeddings=embeddings[i : i + self.batch_size],
+                documents=(
+                    list(documents[i : i + self.batch_size]) if documents else None
+                ),
+            )
+
+    def search(self, query_embeddings, k=10):
+        results = self.collection.query(
+            query_embeddings=np.asarray(query_embeddings, dtype=np.float32),
+            n_results=k,
+            include=["distances"],
+        )
+        return results["ids"], results["distances"]
+
+
+class NumpyBackend(RetrievalBackend):
+    """
+    Exact search. `space` mirrors Chroma's `hnsw:space` so rankings are comparable:
+    l2 (Chroma's default, squared euclidean), cosine (1 - cos sim), ip (1 - dot).
+    """
+
+    name = "numpy"
+
+    def __init__(self, space: Space = "l2"):
+        self.space = space
+        self.ids: np.ndarray = np.empty(0, dtype=object)
+        self.matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self._sq_norms: np.ndarray = np.empty(0, dtype=np.float32)
+
+    def index(self, ids, embeddings, documents=None) -> None:
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.space == "cosine":
+            matrix = matrix / np.maximum(
+                np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12
+            )
+        self.ids = np.asarray(ids, dtype=object)
+        self.matrix = matrix
+        self._sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query_embeddings: np.ndarray) -> np.ndarray:
+        """
+        (n_queries, n_docs) distance matrix from one matmul.
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if self.space == "cosine":
+            queries = queries / np.maximum(
+                np.linalg.norm(queries, axis=1, keepdims=True), 1e-12
+            )
+        dots = queries @ self.matrix.T
+        if self.space == "l2":
+            q_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+            return np.maximum(q_sq - 2 * dots + self._sq_norms[None, :], 0)
+        return 1 - dots
+
+    def search(self, query_embeddings, k=10):
+        distances = self.scores(query_embeddings)
+        k = min(k, distances.shape[1])
+        if k == 0:
+            return [[] for _ in distances], [[] for _ in distances]
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        return self.ids[top].tolist(), top_distances.tolist()
+
+
+def recall_against(exact: list[dict], approximate: list[dict]) -> float:
+    """
+    Mean fraction of the exact top-k that the approximate backend also returned.
+    Both arguments are result lists in {"query", "match"} shape, same query order.
+    """
+    if not exact:
+        return 0.0
+    recalls = [
+        len(set(e["match"]) & set(a["match"])) / len(e["match"]) if e["match"] else 1.0
+        for e, a in zip(exact, approximate)
+    ]
+    return sum(recalls) / len(recalls)
@@ -0,0 +1,115 @@
+"""
+Length-aware batching.
+
+Transcripts vary from a few hundred to tens of thousands of tokens. With a fixed
+batch size every batch pads to its longest member, so a batch mixing one long
+transcript with 99 short ones costs 100 long ones' worth of compute (and memory).
+
+`plan_batches` sorts items by length and packs them into batches whose padded
+cost (`len(batch) * longest`) stays under a token budget: long documents go in
+small batches, short ones in big ones. `encode_in_batches` runs an encoder over
+such a plan and puts the output back in the original order.
+
+For uploads there's no padding, so batches are packed by summed payload size
+instead (`padded=False`), keeping request bodies roughly constant in size.
+"""
+
+import numpy as np
+from typing import Callable, Optional, Sequence
+from winnow.utils import estimate_tokens
+
+
+def token_lengths(
+    texts: Sequence[str], tokenizer=None, max_length: Optional[int] = None
+) -> list[int]:
+    """
+    Token count per text as the encoder will see it (truncated to max_length).
+    Without a tokenizer, estimates ~4 characters per token.
+    """
+    if tokenizer is None:
+        lengths = [estimate_tokens(text) for text in texts]
+    else:
+        encoded = tokenizer(
+            list(texts),
+            truncation=max_length is not None,
+            max_length=max_length,
+            add_special_tokens=True,
+            verbose=False,
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+    if max_length:
+        lengths = [min(length, max_length) for length in lengths]
+    return lengths
+
+
+def plan_batches(
+    lengths: Sequence[int],
+    budget: int,
+    max_batch_size: Optional[int] = None,
+    padded: bool = True,
+) -> list[list[int]]:
+    """
+    Group item indices into batches under `budget`.
+
+    padded=True: items are sorted longest first and a batch costs
+        len(batch) * longest item (what a padded encoder forward pass costs).
+    padded=False: items keep their order and a batch costs the sum of lengths.
+    An item larger than the budget on its own still gets a batch to itself.
+    """
+    order = (
+        sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+        if padded
+        else range(len(lengths))
+    )
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    cost = 0
+    longest = 0
+    for i in order:
+        length = max(lengths[i], 1)
+        if padded:
+            new_cost = (len(batch) + 1) * max(longest, length)
+        else:
+            new_cost = cost + length
+        full = max_batch_size is not None and len(batch) >= max_batch_size
+        if batch and (new_cost > budget or full):
+            batches.append(batch)
+            batch, cost, longest = [], 0, 0
+            new_cost = length
+        batch.append(i)
+        cost = new_cost
+        longest = max(longest, length)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padding_efficiency(lengths: Sequence[int], batches: list[list[int]]) -> float:
+    """
+    Real tokens / padded tokens for a batch plan (1.0 means no padding).
+    """
+    real = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    return real / padded if padded else 1.0
+
+
+def encode_in_batches(
+    texts: Sequence[str],
+    encode: Callable[[list[str]], Sequence],
+    lengths: Sequence[int],
+    budget: int,
+    max_batch_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Encode `texts` in length-sorted, token-budgeted batches and return the
+    embeddings in the original order.
+    """
+    if not len(texts):
+        return np.empty((0, 0), dtype=np.float32)
+    out: Optional[np.ndarray] = None
+    for batch in plan_batches(lengths, budget, max_batch_size, padded=True):
+        embeddings = np.asarray(encode([texts[i] for i in batch]), dtype=np.float32)
+        if out is None:
+            out = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+        out[batch] = embeddings
+    return out
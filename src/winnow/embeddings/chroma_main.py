@@ -18,7 +18,7 @@ https://huggingface.co/spaces/mteb/leaderboard
 Datastax post:
 https://www.datastax.com/blog/best-embedding-models-information-retrieval-2025
 
-CUDA is turned on in embedding declaration. (device = "cuda")
+Encoders run on CUDA when available and fall back to CPU (see encoders.py).
 
 TODO:
 - create test data set
@@ -27,12 +27,25 @@ TODO:
  - compare s2s on course descriptions vs. s2p for course transcripts
 """
 
-import torch
 import sys
 import chromadb
 import json
-import pickle
+from typing import Optional
 from chromadb.utils import embedding_functions
+from winnow.embeddings.embedding_cache import embedding_cache, content_hash
+from winnow.embeddings.collection_sync import sync_collection, HASH_KEY
+from winnow.embeddings.backends import ChromaBackend, NumpyBackend
+from winnow.embeddings.chunking import (
+    ChunkedBackend,
+    chunker_settings,
+    index_stream,
+    iter_chunks,
+)
+from winnow.embeddings.encoders import get_encoder, resolve_device
+from winnow.embeddings.ingest import chroma_uploader, run_ingest
+from winnow.embeddings.result_store import ResultStore
+from winnow.embeddings.sweep import run_sweep
+from winnow.embeddings.titles import TitleResolver, bulk_lookup
 from kramer.database.MongoDB_CRUD import get_all_courses_sync
 from kramer.database.MongoDB_course_mapping import get_course_title
 
@@ -66,15 +79,45 @@ def update_progress(current, total) -> None:
         print("\rProgress: |" + "=" * 100 + f"| {current} of {total} | 100% Complete\n")
 
 
-def generate_test_data() -> tuple[list, list]:
-    courses = get_all_courses_sync()
+def generate_test_data(courses: Optional[list] = None) -> tuple[list, list]:
+    if courses is None:
+        courses = get_all_courses_sync()
     ids = [str(course.course_admin_id) for course in courses]
     documents = [course.course_transcript for course in courses]
     return ids, documents
 
 
+def get_embedding_function(
+    model_name: str,
+    device: Optional[str] = None,
+    backend: Optional[str] = None,
+    dimensions: Optional[int] = None,
+):
+    """
+    Chroma embedding function for a model name ("default" is all-MiniLM-L6-v2).
+    Device and encoder backend default to whatever this box and ENCODER_BACKENDS say.
+    """
+    if model_name == "default":
+        return embedding_functions.DefaultEmbeddingFunction()
+    return get_encoder(
+        model_name, device=device, backend=backend, dimensions=dimensions
+    )
+
+
 def test_model(
-    model_name: str, test_data: tuple[list, list], queries: list[str]
+    model_name: str,
+    test_data: tuple[list, list],
+    queries: list[str],
+    sync: bool = True,
+    backend: str = "chroma",
+    k: int = 10,
+    query_chunk_size: int = 1024,
+    chunk: bool = False,
+    chunk_overlap: int = 32,
+    chunk_aggregation: str = "max",
+    device: Optional[str] = None,
+    encoder_backend: Optional[str] = None,
+    dimensions: Optional[int] = None,
 ) -> list[dict]:
     """
     Test the embedding function on a small dataset with an ephemeral collection.
@@ -83,83 +126,150 @@ def test_model(
         model_name: str - the name of the sententence transformers embedding model
         test_data: list[list, list] - list of lists (ids and documents)
         queries: list[str] - a list of queries to test
+        sync: bool - incrementally sync an existing collection (upsert added/changed
+            ids, delete removed ones) instead of rebuilding it on any mismatch
+        backend: str - "chroma" (HNSW over HTTP) or "numpy" (in-process exact search)
+        k: int - number of matches per query
+        query_chunk_size: int - queries embedded and searched per batch
+        chunk: bool - index token-window chunks of each transcript (sized by the
+            model's tokenizer) instead of one truncated document per course
+        chunk_overlap: int - tokens shared by consecutive chunks
+        chunk_aggregation: str - "max" or "sum" similarity when folding chunk hits
+            back to course ids
+        device: str - encoder device (default: cuda if available, else cpu)
+        encoder_backend: str - "torch", "onnx" or "int8" (default: ENCODER_BACKENDS)
+        dimensions: int - truncate (Matryoshka) embeddings to this many dimensions
 
     Returns:
         results: list[result]
         result: dict - keys: query: str, match: list[str]
     """
+    embedding_function = get_embedding_function(
+        model_name, device=device, backend=encoder_backend, dimensions=dimensions
+    )
+    # Backends produce slightly different vectors, so they're cached and indexed apart.
+    cache_name = getattr(embedding_function, "cache_key", model_name)
     collection_name = (
-        f"test_collection_{model_name}".replace(" ", "_")
+        f"test_collection_{cache_name}".replace(" ", "_")
         .replace(".", "_")
         .replace("/", "-")
+        .replace("@", "_")
     )
-    if model_name == "default":
-        embedding_function = embedding_functions.DefaultEmbeddingFunction()
-    else:
-        embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=model_name, device="cuda"
+    ids, documents = test_data
+    records = zip(ids, documents)
+    if chunk:
+        collection_name += "_chunked"
+        spans, max_tokens = chunker_settings(embedding_function)
+        records = (
+            (c.id, c.text)
+            for c in iter_chunks(records, spans, max_tokens, overlap=chunk_overlap)
         )
-    new_collection = True
-    try:
-        collection = client.get_collection(
-            collection_name, embedding_function=embedding_function
+    if backend == "numpy":
+        # Same metric Chroma builds the collection with, so the baselines agree.
+        engine = NumpyBackend(space=embedding_function.default_space())
+        if chunk:
+            engine = ChunkedBackend(engine, how=chunk_aggregation)
+        index_stream(
+            engine,
+            records,
+            lambda texts: embedding_cache.embed(
+                cache_name, texts, embedding_function, verbose=False
+            ),
+        )
+        return engine.query_batch(
+            queries, embedding_function, k=k, chunk_size=query_chunk_size
         )
-        ids = collection.get()["ids"]
-        print(f"# of ids in db: {len(ids)}, # of actual ids: {len(test_data[0])}")
-        if len(ids) == len(test_data[0]):
-            print(f"Collection {collection_name} already exists.")
-            new_collection = False
-        else:
-            client.delete_collection(collection_name)
-    except:
-        pass
-    if new_collection:
-        collection = client.create_collection(
+    if sync or chunk:
+        collection = client.get_or_create_collection(
             collection_name, embedding_function=embedding_function
         )
-        ids, documents = test_data
-        batch_size = 100
-        # Batch em up and load 'em into the collection
-        for i in range(0, len(ids), batch_size):
-            update_progress(i + 1, len(ids))
-            collection.add(
-                ids=ids[i : i + batch_size], documents=documents[i : i + batch_size]
+        sync_collection(
+            collection,
+            records,
+            model_name=cache_name,
+            embedding_function=embedding_function,
+        )
+    else:
+        new_collection = True
+        try:
+            collection = client.get_collection(
+                collection_name, embedding_function=embedding_function
+            )
+            count = collection.count()
+            print(f"# of ids in db: {count}, # of actual ids: {len(ids)}")
+            if count == len(ids):
+                print(f"Collection {collection_name} already exists.")
+                new_collection = False
+            else:
+                client.delete_collection(collection_name)
+        except:
+            pass
+        if new_collection:
+            collection = client.create_collection(
+                collection_name, embedding_function=embedding_function
+            )
+            upload = chroma_uploader(
+                collection,
+                batch_size=100,
+                metadata=lambda document: {HASH_KEY: content_hash(document)},
             )
-    results = []
-    for query in queries:
-        query_results = collection.query(query_texts=[query])
-        matches = query_results["ids"][0]
-        result = {"query": query, "match": matches}
-        results.append(result)
-    return results
+            uploaded = 0
+
+            def upload_with_progress(batch_ids, batch_documents, embeddings):
+                nonlocal uploaded
+                upload(batch_ids, batch_documents, embeddings)
+                uploaded += len(batch_ids)
+                update_progress(uploaded, len(ids))
+
+            # Encoding overlaps uploading; only new or changed documents hit the
+            # encoder, the rest come off disk.
+            run_ingest(
+                records,
+                encode=lambda batch: embedding_cache.embed(
+                    cache_name, batch, embedding_function, verbose=False
+                ),
+                upload=upload_with_progress,
+            )
+    engine = ChromaBackend(collection)
+    if chunk:
+        engine = ChunkedBackend(engine, how=chunk_aggregation)
+    return engine.query_batch(
+        queries, embedding_function, k=k, chunk_size=query_chunk_size
+    )
 
 
 def add_to_chroma(
     collection: chromadb.Collection, ids, documents, embeddings=[], model="default"
 ):
     """
-    WIP: Wrapper function that adds ids and documents to a Chroma collection.
+    Wrapper function that adds ids and documents to a Chroma collection.
     Note: chroma's default is all-MiniLM-L6-v2.
+    If embeddings aren't provided, they're pulled from (or added to) the embedding cache.
     """
-    # Handle default case, also if user provides embeddings
-    if model == "default" or "MiniLM-L6-v2" in model:
-        kwargs = {"ids": ids, "documents": documents}
-        if embeddings:
-            kwargs.update({"embeddings": embeddings})
-    else:
-        embedding_function = embedding_functions[model]
-        embeddings = embedding_function(documents)
-        kwargs = {"ids": ids, "documents": documents, "embeddings": embeddings}
+    if not len(embeddings):
+        embedding_function = get_embedding_function(model)
+        embeddings = embedding_cache.embed(
+            getattr(embedding_function, "cache_key", model),
+            documents,
+            embedding_function,
+        )
+    collection.add(
+        ids=ids,
+        documents=documents,
+        embeddings=embeddings,
+        metadatas=[{HASH_KEY: content_hash(document)} for document in documents],
+    )
 
 
 if __name__ == "__main__":
-    # Check if cuda is available
-    if torch.cuda.is_available():
-        print("CUDA is available.")
-    else:
-        print("CUDA is not available.")
-        sys.exit()
-    test_data = generate_test_data()
+    print(f"Encoding on: {resolve_device()}")
+    courses = get_all_courses_sync()
+    test_data = generate_test_data(courses)
+    # Titles for printing come from the catalog already in memory, not per-match
+    # lookups; ids outside it are looked up together.
+    titles = TitleResolver.from_courses(
+        courses, fallback=bulk_lookup(get_course_title)
+    )
     models = [
         "intfloat/e5-mistral-7b-instruct",
         "voyageai/voyage-3-m-exp",
@@ -226,25 +336,35 @@ if __name__ == "__main__":
         "Legacy system maintenance",
         "Future of mobile apps",
     ]
-    all_results = []
-    output = ""
-    for model in models:
-        print(f"Testing model: {model}")
+    # Results land on disk model by model; a re-run picks up where the last stopped.
+    store = ResultStore()
+    completed = store.completed_models()
+    if completed:
+        print(f"Resuming sweep: skipping {len(completed)} completed models.")
+    # One worker process per model: weights are freed when each model finishes.
+    # Raise pool_size on CPU boxes to run small models side by side.
+    for outcome in run_sweep(
+        [model for model in models if model not in completed],
+        test_data,
+        queries,
+        pool_size=1,
+        memory_limit_gb=None,
+        timeout=6 * 60 * 60,
+    ):
+        model = outcome["model_name"]
+        print(f"Tested model: {model} ({outcome['duration']:.1f}s)")
         print("======================================")
-        try:
-            results = test_model(model_name=model, test_data=test_data, queries=queries)
-            for result in results:
-                result.update({"model": model})
-                print(f"{result['query']}")
-                for match in result["match"]:
-                    try:
-                        print(f"\t{get_course_title(int(match))}")
-                    except:
-                        print(f"\tCouldn't retrieve course title for {match}.")
-            all_results.append(results)
-        except:
-            print(f"Failed to test model: {model}")
+        if outcome["status"] != "SUCCESS":
+            print(f"Failed to test model: {model}: {outcome['output']}")
             continue
-    # Save all_results to a pickle
-    with open("all_results.pkl", "wb") as f:
-        pickle.dump(all_results, f)
+        results = outcome["output"]
+        result_titles = titles.resolve_results(results)
+        for result in results:
+            print(f"{result['query']}")
+            for match in result["match"]:
+                title = result_titles.get(str(match))
+                if title is None:
+                    print(f"\tCouldn't retrieve course title for {match}.")
+                else:
+                    print(f"\t{title}")
+        store.append(model, results)
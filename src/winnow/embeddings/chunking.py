@@ -0,0 +1,190 @@
+"""
+Token-window chunking for long course transcripts.
+
+Most transcripts are far longer than an embedding model's `max_seq_length`, so
+encoding them whole silently truncates everything after the first few hundred
+tokens. Instead we split each transcript into overlapping windows sized by the
+model's own tokenizer, index the chunks (`<course_admin_id>::<n>`), and fold
+chunk hits back to courses at query time with ChunkedBackend.
+
+Chunks come out of a generator, so indexing the full catalog never holds more
+than one transcript's token offsets in memory.
+"""
+
+import copy
+import re
+import numpy as np
+from collections import defaultdict
+from itertools import batched
+from typing import Callable, Iterable, Iterator, Literal, NamedTuple
+from winnow.embeddings.backends import RetrievalBackend
+
+CHUNK_SEPARATOR = "::"
+Aggregation = Literal["max", "sum"]
+
+
+class Chunk(NamedTuple):
+    id: str  # "<parent id>::<n>"
+    parent_id: str
+    text: str
+
+
+def parent_id(chunk_id: str) -> str:
+    return chunk_id.rsplit(CHUNK_SEPARATOR, 1)[0]
+
+
+def whitespace_spans(text: str) -> list[tuple[int, int]]:
+    """
+    Fallback "tokenizer" (character spans of non-whitespace runs).
+    """
+    return [match.span() for match in re.finditer(r"\S+", text)]
+
+
+def tokenizer_spans(tokenizer) -> Callable[[str], list[tuple[int, int]]]:
+    """
+    Character spans of each token, from a HuggingFace fast tokenizer.
+
+    Works on a private copy: a fast tokenizer keeps truncation settings on the
+    shared Rust object and resets them on every call, so chunking in the ingest
+    producer thread while the encoder tokenizes (with truncation) in another can
+    fail with "Already borrowed", hang, or cut transcripts at max_seq_length.
+    """
+    tokenizer = copy.deepcopy(tokenizer)
+
+    def spans(text: str) -> list[tuple[int, int]]:
+        encoding = tokenizer(
+            text,
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )
+        return [tuple(span) for span in encoding["offset_mapping"]]
+
+    return spans
+
+
+def chunker_settings(embedding_function) -> tuple[Callable, int]:
+    """
+    (span function, tokens per chunk) for an embedding function. Uses the wrapped
+    SentenceTransformer's tokenizer and max_seq_length where there is one.
+    """
+    model = getattr(embedding_function, "_model", None)
+    tokenizer = getattr(model, "tokenizer", None)
+    max_seq_length = getattr(model, "max_seq_length", None)
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        return whitespace_spans, max_seq_length or 256
+    # Leave room for the special tokens ([CLS]/[SEP] etc.) the encoder adds.
+    special = tokenizer.num_special_tokens_to_add(pair=False)
+    return tokenizer_spans(tokenizer), (max_seq_length or 512) - special
+
+
+def iter_chunks(
+    records: Iterable[tuple[str, str]],
+    spans: Callable[[str], list[tuple[int, int]]] = whitespace_spans,
+    max_tokens: int = 256,
+    overlap: int = 32,
+) -> Iterator[Chunk]:
+    """
+    Lazily yield overlapping token windows for each (id, document) record.
+    Each chunk is a slice of the original text, so nothing is re-detokenized.
+    """
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be >= 0 and smaller than max_tokens.")
+    stride = max_tokens - overlap
+    for id, document in records:
+        token_spans = spans(document)
+        if not token_spans:
+            continue
+        for n, start in enumerate(range(0, len(token_spans), stride)):
+            window = token_spans[start : start + max_tokens]
+            yield Chunk(
+                id=f"{id}{CHUNK_SEPARATOR}{n}",
+                parent_id=id,
+                text=document[window[0][0] : window[-1][1]],
+            )
+            if start + max_tokens >= len(token_spans):
+                break
+
+
+def aggregate_hits(
+    chunk_ids: list[str],
+    distances: list[float],
+    k: int = 10,
+    how: Aggregation = "max",
+) -> tuple[list[str], list[float]]:
+    """
+    Fold ranked chunk hits into ranked parents.
+    max: a parent scores as its best chunk (distance kept as is).
+    sum: a parent scores the summed similarity (1 - distance) of its chunks, returned
+        negated so lower is still better. Only meaningful in cosine/ip space.
+    """
+    if how == "max":
+        best: dict[str, float] = {}
+        for chunk_id, distance in zip(chunk_ids, distances):
+            parent = parent_id(chunk_id)
+            if parent not in best:  # hits arrive best first
+                best[parent] = distance
+        ranked = list(best.items())
+    elif how == "sum":
+        totals: dict[str, float] = defaultdict(float)
+        for chunk_id, distance in zip(chunk_ids, distances):
+            totals[parent_id(chunk_id)] += 1 - distance
+        ranked = sorted(
+            ((parent, -total) for parent, total in totals.items()), key=lambda x: x[1]
+        )
+    else:
+        raise ValueError(f"Unknown aggregation: {how}")
+    ranked = ranked[:k]
+    return [parent for parent, _ in ranked], [score for _, score in ranked]
+
+
+class ChunkedBackend(RetrievalBackend):
+    """
+    Wraps a backend indexed with chunk ids and returns parent (course) ids.
+    Asks the inner backend for `k * oversample` chunks so that k distinct
+    courses survive aggregation.
+    """
+
+    def __init__(
+        self, inner: RetrievalBackend, how: Aggregation = "max", oversample: int = 5
+    ):
+        self.inner = inner
+        self.how = how
+        self.oversample = oversample
+        self.name = f"{inner.name}+chunks"
+
+    def index(self, ids, embeddings, documents=None) -> None:
+        self.inner.index(ids, embeddings, documents)
+
+    def search(self, query_embeddings, k=10):
+        chunk_ids, chunk_distances = self.inner.search(
+            query_embeddings, k=k * self.oversample
+        )
+        ids, distances = [], []
+        for query_ids, query_distances in zip(chunk_ids, chunk_distances):
+            parents, scores = aggregate_hits(query_ids, query_distances, k, self.how)
+            ids.append(parents)
+            distances.append(scores)
+        return ids, distances
+
+
+def index_stream(
+    backend: RetrievalBackend,
+    records: Iterable[tuple[str, str]],
+    embed: Callable[[list[str]], np.ndarray],
+    batch_size: int = 1024,
+) -> int:
+    """
+    Stream (id, text) records, e.g. chunks, through `embed` a batch at a time and
+    index the lot (for in-memory backends, which need the full matrix). Returns
+    the record count. Only vectors and ids are kept; text is dropped once encoded.
+    """
+    ids: list[str] = []
+    blocks: list[np.ndarray] = []
+    for batch in batched(records, batch_size):
+        blocks.append(np.asarray(embed([text for _, text in batch]), np.float32))
+        ids.extend(id for id, _ in batch)
+    if blocks:
+        backend.index(ids, np.concatenate(blocks))
+    return len(ids)
@@ -0,0 +1,104 @@
+"""
+Incremental sync of a Chroma collection against the course corpus.
+
+Every record carries the sha256 of its document in its metadata
+(`{"content_hash": ...}`), so a sync only has to pull metadatas, diff them
+against the corpus, upsert what was added or edited, and delete what's gone.
+Editing one course in a catalog of thousands costs one embedding.
+"""
+
+import chromadb
+from pydantic import BaseModel, Field
+from typing import Callable, Iterable, Iterator, Optional
+from winnow.embeddings.embedding_cache import EmbeddingCache, content_hash, embedding_cache
+from winnow.embeddings.ingest import chroma_uploader, run_ingest
+
+HASH_KEY = "content_hash"
+
+
+class SyncReport(BaseModel):
+    collection: str = Field(description="Name of the synced collection")
+    added: list[str] = Field(default_factory=list, description="Ids that were new")
+    changed: list[str] = Field(
+        default_factory=list, description="Ids whose document content changed"
+    )
+    removed: list[str] = Field(
+        default_factory=list, description="Ids no longer in the corpus"
+    )
+    unchanged: int = Field(default=0, description="Number of untouched ids")
+
+    def __str__(self) -> str:
+        return (
+            f"Synced {self.collection}: {len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged."
+        )
+
+
+def get_content_hashes(
+    collection: chromadb.Collection, page_size: int = 1000
+) -> dict[str, Optional[str]]:
+    """
+    Map id -> stored content hash (None for records written without one).
+    Pulls metadatas only, a page at a time.
+    """
+    hashes: dict[str, Optional[str]] = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for id, metadata in zip(page["ids"], page["metadatas"] or []):
+            hashes[id] = (metadata or {}).get(HASH_KEY)
+        if len(page["ids"]) < page_size:
+            return hashes
+        offset += page_size
+
+
+def sync_collection(
+    collection: chromadb.Collection,
+    records: Iterable[tuple[str, str]],
+    model_name: str,
+    embedding_function: Callable,
+    cache: EmbeddingCache = embedding_cache,
+    batch_size: int = 100,
+    verbose: bool = True,
+) -> SyncReport:
+    """
+    Bring `collection` in line with `records`, an iterable of (id, document):
+    upsert added or changed records, delete removed ones, leave everything else
+    alone. Records are consumed lazily through the streaming ingest pipeline, so
+    a generator (e.g. chunking.iter_chunks) never has to be materialized.
+    """
+    stored = get_content_hashes(collection)
+    report = SyncReport(collection=collection.name)
+    seen: set[str] = set()
+
+    def changed_records() -> Iterator[tuple[str, str]]:
+        for id, document in records:
+            seen.add(id)
+            if id not in stored:
+                report.added.append(id)
+            elif stored[id] != content_hash(document):
+                report.changed.append(id)
+            else:
+                report.unchanged += 1
+                continue
+            yield id, document
+
+    # Diffing, encoding and upserting overlap; see ingest.py.
+    run_ingest(
+        changed_records(),
+        encode=lambda documents: cache.embed(
+            model_name, documents, embedding_function, verbose=False
+        ),
+        upload=chroma_uploader(
+            collection,
+            batch_size=batch_size,
+            metadata=lambda document: {HASH_KEY: content_hash(document)},
+        ),
+        verbose=verbose,
+    )
+    report.removed = [id for id in stored if id not in seen]
+    for i in range(0, len(report.removed), batch_size):
+        collection.delete(ids=report.removed[i : i + batch_size])
+    if verbose:
+        print(report)
+    return report
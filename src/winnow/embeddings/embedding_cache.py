@@ -0,0 +1,220 @@
+"""
+Content-addressed on-disk embedding cache.
+
+Vectors are keyed by (model name, prompt name, sha256 of the document text) and
+stored as raw float32 in append-only shards:
+
+```
+<root>/<model slug>/<prompt name>/
+    meta.json              # {"dim": 1024}
+    shard_000000.f32       # row-major float32, shape (n, dim)
+    shard_000000.keys      # one content hash per line, row order
+```
+
+A shard is only visible once its `.keys` file exists (written last, via rename),
+so a crash mid-write never corrupts the cache. Shards are opened with
+`np.memmap`, which means a warm sweep reads vectors straight out of the page
+cache instead of re-encoding the corpus.
+
+Usage:
+```python
+cache = EmbeddingCache()
+embeddings = cache.embed("BAAI/bge-large-en-v1.5", documents, embedding_function)
+```
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+dir_path = Path(__file__).parent
+DEFAULT_CACHE_DIR = dir_path / ".embedding_cache"
+DEFAULT_PROMPT = "default"
+
+
+def content_hash(document: str) -> str:
+    """
+    Hash the document text; this is the cache key alongside model and prompt.
+    """
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+def model_slug(model_name: str) -> str:
+    """
+    Filesystem-safe version of a model name (same scheme as collection names).
+    """
+    return model_name.replace(" ", "_").replace(".", "_").replace("/", "-")
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache. One namespace per (model, prompt).
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_CACHE_DIR, shard_size: int = 1024):
+        """
+        root: directory holding the cache
+        shard_size: max number of documents encoded (and persisted) per shard
+        """
+        self.root = Path(root)
+        self.shard_size = shard_size
+        # (model, prompt) -> {hash: (shard memmap index, row)}
+        self._indexes: dict[tuple[str, str], dict[str, tuple[int, int]]] = {}
+        self._shards: dict[tuple[str, str], list[np.memmap]] = {}
+
+    def _namespace(self, model_name: str, prompt_name: Optional[str]) -> Path:
+        return self.root / model_slug(model_name) / (prompt_name or DEFAULT_PROMPT)
+
+    def _dim(self, namespace: Path) -> Optional[int]:
+        meta = namespace / "meta.json"
+        if not meta.exists():
+            return None
+        return json.loads(meta.read_text())["dim"]
+
+    def _load(self, model_name: str, prompt_name: Optional[str]) -> tuple:
+        """
+        Read (and memoize) the hash index and shard memmaps for a namespace.
+        """
+        key = (model_name, prompt_name or DEFAULT_PROMPT)
+        if key in self._indexes:
+            return self._indexes[key], self._shards[key]
+        index: dict[str, tuple[int, int]] = {}
+        shards: list[np.memmap] = []
+        namespace = self._namespace(model_name, prompt_name)
+        dim = self._dim(namespace)
+        if dim is not None:
+            for keys_file in sorted(namespace.glob("shard_*.keys")):
+                hashes = keys_file.read_text().split()
+                if not hashes:
+                    continue
+                shard = np.memmap(
+                    keys_file.with_suffix(".f32"),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(len(hashes), dim),
+                )
+                for row, h in enumerate(hashes):
+                    index[h] = (len(shards), row)
+                shards.append(shard)
+        self._indexes[key] = index
+        self._shards[key] = shards
+        return index, shards
+
+    def contains(
+        self, model_name: str, hashes: Sequence[str], prompt_name: Optional[str] = None
+    ) -> list[bool]:
+        index, _ = self._load(model_name, prompt_name)
+        return [h in index for h in hashes]
+
+    def get(
+        self, model_name: str, hashes: Sequence[str], prompt_name: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Stack the cached vectors for `hashes` into a (n, dim) float32 matrix.
+        Raises KeyError if any hash is missing.
+
+        Rows are gathered with one fancy-indexed read per shard. When they're a
+        contiguous run of a single shard (e.g. re-reading what was just
+        encoded), the result is a read-only view of the memmap, with no copy.
+        """
+        index, shards = self._load(model_name, prompt_name)
+        dim = shards[0].shape[1] if shards else 0
+        if not len(hashes):
+            return np.empty((0, dim), dtype=np.float32)
+        locations = np.array([index[h] for h in hashes], dtype=np.int64)
+        shard_ids, rows = locations[:, 0], locations[:, 1]
+        first = rows[0]
+        if (shard_ids == shard_ids[0]).all() and (
+            rows == np.arange(first, first + len(rows))
+        ).all():
+            return shards[shard_ids[0]][first : first + len(rows)]
+        out = np.empty((len(hashes), dim), dtype=np.float32)
+        for shard in np.unique(shard_ids):
+            mask = shard_ids == shard
+            out[mask] = shards[shard][rows[mask]]
+        return out
+
+    def append(
+        self,
+        model_name: str,
+        hashes: Sequence[str],
+        vectors: np.ndarray,
+        prompt_name: Optional[str] = None,
+    ) -> None:
+        """
+        Write a new shard. Existing shards are never modified.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(hashes):
+            raise ValueError(
+                f"Expected {len(hashes)} vectors, got array of shape {vectors.shape}."
+            )
+        if not len(hashes):
+            return
+        index, shards = self._load(model_name, prompt_name)
+        namespace = self._namespace(model_name, prompt_name)
+        namespace.mkdir(parents=True, exist_ok=True)
+        dim = self._dim(namespace)
+        if dim is None:
+            dim = vectors.shape[1]
+            (namespace / "meta.json").write_text(json.dumps({"dim": dim}))
+        elif dim != vectors.shape[1]:
+            raise ValueError(
+                f"Cache for {model_name} holds {dim}-d vectors, got {vectors.shape[1]}-d."
+            )
+        shard_number = len(list(namespace.glob("shard_*.keys")))
+        stem = namespace / f"shard_{shard_number:06d}"
+        # Vectors first, keys last: the shard only "exists" once the keys land.
+        tmp = stem.with_suffix(".f32.tmp")
+        vectors.tofile(tmp)
+        os.replace(tmp, stem.with_suffix(".f32"))
+        tmp = stem.with_suffix(".keys.tmp")
+        tmp.write_text("\n".join(hashes) + "\n")
+        os.replace(tmp, stem.with_suffix(".keys"))
+        shard = np.memmap(
+            stem.with_suffix(".f32"), dtype=np.float32, mode="r", shape=vectors.shape
+        )
+        for row, h in enumerate(hashes):
+            index[h] = (len(shards), row)
+        shards.append(shard)
+
+    def embed(
+        self,
+        model_name: str,
+        documents: Sequence[str],
+        encode: Callable[[list[str]], Sequence],
+        prompt_name: Optional[str] = None,
+        verbose: bool = True,
+    ) -> np.ndarray:
+        """
+        Return embeddings for `documents`, only calling `encode` on documents whose
+        content hash isn't cached yet. New vectors are persisted shard by shard,
+        so an interrupted run keeps whatever it already encoded.
+
+        encode: any callable taking a list of strings and returning an array-like
+            of shape (n, dim), e.g. a chroma embedding function.
+        """
+        hashes = [content_hash(document) for document in documents]
+        index, _ = self._load(model_name, prompt_name)
+        missing: dict[str, str] = {}
+        for h, document in zip(hashes, documents):
+            if h not in index and h not in missing:
+                missing[h] = document
+        if verbose:
+            print(
+                f"Embedding cache [{model_name}]: {len(hashes)} documents, {len(missing)} to encode."
+            )
+        missing_hashes = list(missing)
+        for i in range(0, len(missing_hashes), self.shard_size):
+            batch = missing_hashes[i : i + self.shard_size]
+            vectors = np.asarray(
+                encode([missing[h] for h in batch]), dtype=np.float32
+            )
+            self.append(model_name, batch, vectors, prompt_name=prompt_name)
+        return self.get(model_name, hashes, prompt_name=prompt_name)
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,261 @@
+"""
+Device-aware encoder factory.
+
+Much of the fleet is CPU-only, so nothing here assumes CUDA: `resolve_device`
+falls back to CPU, and each model can pick the encoder backend that is fastest
+for it on that hardware:
+
+- "torch": fp32 PyTorch (the original path)
+- "onnx": ONNX Runtime via sentence-transformers' onnx backend
+  (needs the `onnx` extra: `sentence-transformers[onnx]`)
+- "int8": PyTorch with dynamic int8 quantization of the Linear layers (CPU only)
+
+`dimensions` truncates (and renormalizes) embeddings for Matryoshka-trained
+models such as stella_en_400M_v5; see matryoshka.py for the dimension sweep.
+
+`token_budget` switches encoding to length-sorted batches packed to a padded
+token budget (see batching.py) instead of a fixed batch size.
+
+`benchmark_backends` measures docs/sec for each backend against fp32 torch so the
+choice can be made per model from numbers rather than by feel.
+"""
+
+import numpy as np
+from winnow.embeddings.batching import encode_in_batches, token_lengths
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from time import time
+from typing import Literal, Optional
+
+Backend = Literal["torch", "onnx", "int8"]
+BACKENDS: tuple[Backend, ...] = ("torch", "onnx", "int8")
+
+# Per-model backend choice; anything not listed runs on fp32 torch.
+# Fill this in from benchmark_backends() results.
+ENCODER_BACKENDS: dict[str, Backend] = {}
+
+# Padded tokens per forward pass when batching by token budget (e.g. 32 x 512).
+DEFAULT_TOKEN_BUDGET = 16384
+
+# Extra SentenceTransformer kwargs some models need.
+MODEL_KWARGS: dict[str, dict] = {
+    "NovaSearch/stella_en_400M_v5": {"trust_remote_code": True},
+    "dunzhang/stella_en_400M_v5": {"trust_remote_code": True},
+}
+# stella's memory-efficient attention and unpadding are CUDA-only.
+CPU_MODEL_KWARGS: dict[str, dict] = {
+    model_name: {
+        "config_kwargs": {"use_memory_efficient_attention": False, "unpad_inputs": False}
+    }
+    for model_name in MODEL_KWARGS
+}
+
+
+def truncate_embeddings(embeddings, dimensions: Optional[int]) -> np.ndarray:
+    """
+    Keep the first `dimensions` components and L2-renormalize (Matryoshka).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if not dimensions or dimensions >= embeddings.shape[-1]:
+        return embeddings
+    truncated = embeddings[..., :dimensions]
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """
+    Use the requested device, else CUDA if it's there, else CPU.
+    """
+    if device:
+        return device
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class Encoder(SentenceTransformerEmbeddingFunction):
+    """
+    Chroma's SentenceTransformerEmbeddingFunction with device fallback and a
+    selectable backend. Unlike the parent it doesn't share models through a
+    class-level cache (keyed by name only, so fp32 and int8 copies of a model
+    would collide, and weights would never be freed).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: Optional[str] = None,
+        backend: Backend = "torch",
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        dimensions: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        **kwargs,
+    ):
+        from sentence_transformers import SentenceTransformer
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown encoder backend: {backend}")
+        self.model_name = model_name
+        self.device = resolve_device(device)
+        self.backend = backend
+        self.normalize_embeddings = normalize_embeddings
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+        self.token_budget = token_budget
+        if backend == "onnx":
+            kwargs["backend"] = "onnx"
+        self.kwargs = kwargs
+        if backend == "int8" and self.device != "cpu":
+            raise ValueError("int8 dynamic quantization only runs on CPU.")
+        self._model = SentenceTransformer(
+            model_name_or_path=model_name, device=self.device, **kwargs
+        )
+        if backend == "int8":
+            import torch
+
+            self._model = torch.ao.quantization.quantize_dynamic(
+                self._model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        full = self._model.get_sentence_embedding_dimension()
+        if dimensions and full and dimensions > full:
+            raise ValueError(
+                f"{model_name} produces {full}-d embeddings; can't truncate to {dimensions}."
+            )
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Name for the embedding cache: vectors from different backends (or
+        truncated to different sizes) differ, so they get their own namespace.
+        """
+        parts = [self.model_name]
+        if self.backend != "torch":
+            parts.append(self.backend)
+        if self.dimensions:
+            parts.append(f"{self.dimensions}d")
+        return "@".join(parts)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(
+            texts,
+            batch_size=len(texts) if self.token_budget else self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize_embeddings,
+        )
+
+    def __call__(self, input):
+        texts = list(input)
+        if self.token_budget and texts:
+            # Estimated from characters: the budget only needs relative lengths,
+            # and a real tokenizer pass here would tokenize everything twice
+            # (encode() tokenizes again).
+            lengths = token_lengths(texts, max_length=self._model.max_seq_length)
+            embeddings = encode_in_batches(
+                texts, self._encode, lengths, self.token_budget
+            )
+        else:
+            embeddings = self._encode(texts)
+        embeddings = truncate_embeddings(embeddings, self.dimensions)
+        return [np.array(embedding, dtype=np.float32) for embedding in embeddings]
+
+
+def get_encoder(
+    model_name: str,
+    device: Optional[str] = None,
+    backend: Optional[Backend] = None,
+    dimensions: Optional[int] = None,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+) -> Encoder:
+    """
+    Build the encoder for a model, using its ENCODER_BACKENDS entry unless a
+    backend is given. GPU-less boxes get CPU automatically.
+    """
+    backend = backend or ENCODER_BACKENDS.get(model_name, "torch")
+    device = resolve_device(device)
+    if device != "cpu" and backend == "int8":
+        device = "cpu"
+    kwargs = dict(MODEL_KWARGS.get(model_name, {}))
+    if device == "cpu":
+        kwargs.update(CPU_MODEL_KWARGS.get(model_name, {}))
+    return Encoder(
+        model_name,
+        device=device,
+        backend=backend,
+        dimensions=dimensions,
+        token_budget=token_budget,
+        **kwargs,
+    )
+
+
+def benchmark_backends(
+    model_name: str,
+    documents: list[str],
+    backends: tuple[Backend, ...] = BACKENDS,
+    device: Optional[str] = None,
+) -> list[dict]:
+    """
+    Encode `documents` with each backend and report load time, docs/sec and
+    speedup over fp32 torch. Backends that fail to load (e.g. no onnxruntime)
+    come back with status FAIL rather than aborting the run.
+    """
+    results = []
+    baseline = None
+    for backend in backends:
+        try:
+            start = time()
+            encoder = get_encoder(model_name, device=device, backend=backend)
+            load_time = time() - start
+            encoder(documents[: encoder.batch_size])  # warm-up
+            start = time()
+            encoder(documents)
+            docs_per_sec = len(documents) / (time() - start)
+            if backend == "torch":
+                baseline = docs_per_sec
+            results.append(
+                {
+                    "model_name": model_name,
+                    "backend": backend,
+                    "device": encoder.device,
+                    "status": "SUCCESS",
+                    "load_time": load_time,
+                    "docs_per_sec": docs_per_sec,
+                }
+            )
+            del encoder
+        except Exception as e:
+            results.append(
+                {
+                    "model_name": model_name,
+                    "backend": backend,
+                    "status": "FAIL",
+                    "output": str(e),
+                }
+            )
+    for result in results:
+        if result["status"] == "SUCCESS" and baseline:
+            result["speedup"] = result["docs_per_sec"] / baseline
+    return results
+
+
+def fastest_backend(results: list[dict]) -> Optional[Backend]:
+    """
+    Pick the backend with the highest docs/sec from benchmark_backends output.
+    """
+    succeeded = [r for r in results if r["status"] == "SUCCESS"]
+    if not succeeded:
+        return None
+    return max(succeeded, key=lambda r: r["docs_per_sec"])["backend"]
+
+
+if __name__ == "__main__":
+    import json
+    from winnow.embeddings.chroma_main import generate_test_data
+
+    _, documents = generate_test_data()
+    sample = documents[:256]
+    for model_name in ["all-MiniLM-L12-v2", "BAAI/bge-small-en", "all-mpnet-base-v2"]:
+        results = benchmark_backends(model_name, sample)
+        for result in results:
+            print(json.dumps(result))
+        print(f"Fastest for {model_name}: {fastest_backend(results)}")
@@ -0,0 +1,182 @@
+"""
+HNSW parameter sweep against an exact baseline.
+
+`client.create_collection` in test_model always takes Chroma's default HNSW
+settings. This builds a collection for each (M, construction_ef, search_ef)
+point in a grid and measures:
+
+- build time and on-disk index size (each (M, construction_ef) build gets its
+  own temporary PersistentClient, and only the HNSW segment files are counted,
+  not SQLite's metadata and WAL),
+- p50/p95 single-query latency,
+- recall@k against NumpyBackend's exact search over the same embeddings.
+
+Chroma 1.x names the legacy `hnsw:M` / `hnsw:construction_ef` / `hnsw:search_ef`
+metadata keys `max_neighbors` / `ef_construction` / `ef_search`. search_ef doesn't
+change the graph, so one build serves every search_ef. `collection.modify()`
+only updates the stored configuration, though, not an index already loaded
+in-process, so the client is reopened after each change.
+
+`pareto_frontier` keeps the points no other point beats on both recall and
+latency, which is the short list worth choosing from.
+"""
+
+import itertools
+import tempfile
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Sequence
+from winnow.embeddings.backends import NumpyBackend, Space
+
+DEFAULT_GRID = {
+    "M": (8, 16, 32, 64),
+    "construction_ef": (64, 100, 200, 400),
+    "search_ef": (10, 20, 50, 100, 200),
+}
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def segment_bytes(path: Path) -> int:
+    """
+    Size of the HNSW segment directories (data_level0.bin, link_lists.bin, ...)
+    under a PersistentClient path, leaving out chroma.sqlite3.
+    """
+    return sum(directory_size(d) for d in path.iterdir() if d.is_dir())
+
+
+def reopen(path: Path | str, name: str):
+    """
+    The collection from a fresh client, so the index is loaded with the
+    configuration as stored now.
+    """
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=str(path)).get_collection(name)
+
+
+def hnsw_sweep(
+    ids: Sequence[str],
+    embeddings: np.ndarray,
+    query_embeddings: np.ndarray,
+    grid: dict[str, Sequence[int]] = DEFAULT_GRID,
+    k: int = 10,
+    space: Space = "l2",
+    batch_size: int = 1000,
+    root: Optional[Path | str] = None,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    One row per (M, construction_ef, search_ef) with build_seconds, index_bytes,
+    p50_ms, p95_ms and recall (mean fraction of the exact top-k retrieved).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+    exact = NumpyBackend(space=space)
+    exact.index(ids, embeddings)
+    exact_ids, _ = exact.search(query_embeddings, k=k)
+    exact_sets = [set(match) for match in exact_ids]
+    rows = []
+    name = "hnsw_sweep"
+    for M, construction_ef in itertools.product(grid["M"], grid["construction_ef"]):
+        with tempfile.TemporaryDirectory(dir=root) as tmp:
+            collection = chromadb.PersistentClient(path=tmp).create_collection(
+                name,
+                embedding_function=None,
+                configuration={
+                    "hnsw": {
+                        "space": space,
+                        "max_neighbors": M,
+                        "ef_construction": construction_ef,
+                        "ef_search": grid["search_ef"][0],
+                        # Persist the whole graph at the end of the build instead
+                        # of leaving a tail in the WAL, so the size is complete.
+                        "sync_threshold": max(len(ids), 2),
+                        "batch_size": min(100, max(len(ids), 2)),
+                    }
+                },
+            )
+            start = perf_counter()
+            for i in range(0, len(ids), batch_size):
+                collection.add(
+                    ids=list(ids[i : i + batch_size]),
+                    embeddings=embeddings[i : i + batch_size],
+                )
+            build_seconds = perf_counter() - start
+            index_bytes = segment_bytes(Path(tmp))
+            for search_ef in grid["search_ef"]:
+                collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+                collection = reopen(tmp, name)
+                # The first query after a reopen loads the index from disk.
+                collection.query(
+                    query_embeddings=query_embeddings[:1], n_results=k, include=[]
+                )
+                timings = []
+                recalls = []
+                for query, expected in zip(query_embeddings, exact_sets):
+                    start = perf_counter()
+                    result = collection.query(
+                        query_embeddings=query[None, :], n_results=k, include=[]
+                    )
+                    timings.append(perf_counter() - start)
+                    recalls.append(
+                        len(expected & set(result["ids"][0])) / len(expected)
+                    )
+                row = {
+                    "M": M,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    "build_seconds": build_seconds,
+                    "index_bytes": index_bytes,
+                    "p50_ms": float(np.percentile(timings, 50) * 1000),
+                    "p95_ms": float(np.percentile(timings, 95) * 1000),
+                    "recall": float(np.mean(recalls)),
+                }
+                if verbose:
+                    print(
+                        f"M={M:<3} construction_ef={construction_ef:<4} search_ef={search_ef:<4} "
+                        f"build {build_seconds:6.2f}s | {index_bytes / 1024**2:7.1f} MB | "
+                        f"p50 {row['p50_ms']:6.2f} ms p95 {row['p95_ms']:6.2f} ms | recall@{k} {row['recall']:.3f}"
+                    )
+                rows.append(row)
+            del collection
+            # Drop the cached client before its directory goes away.
+            SharedSystemClient.clear_system_cache()
+    return rows
+
+
+def pareto_frontier(
+    rows: list[dict], maximize: str = "recall", minimize: str = "p95_ms"
+) -> list[dict]:
+    """
+    Rows not dominated on (maximize, minimize), sorted by the `minimize` column.
+    """
+    frontier = []
+    best = -np.inf
+    for row in sorted(rows, key=lambda r: (r[minimize], -r[maximize])):
+        if row[maximize] > best:
+            frontier.append(row)
+            best = row[maximize]
+    return frontier
+
+
+if __name__ == "__main__":
+    from winnow.embeddings.chroma_main import generate_test_data, get_embedding_function
+    from winnow.embeddings.embedding_cache import embedding_cache
+
+    model_name = "BAAI/bge-small-en"
+    ids, documents = generate_test_data()
+    encoder = get_embedding_function(model_name)
+    embeddings = embedding_cache.embed(encoder.cache_key, documents, encoder)
+    # Documents double as queries: a stand-in distribution with no labelling needed.
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(documents), size=min(200, len(documents)), replace=False)
+    query_embeddings = embeddings[sample]
+    rows = hnsw_sweep(ids, embeddings, query_embeddings)
+    print("Pareto frontier (recall vs p95 latency):")
+    for row in pareto_frontier(rows):
+        print(row)
@@ -0,0 +1,182 @@
+"""
+Streaming ingest: course source -> encoder -> index, with backpressure.
+
+```
+records (generator) --[queue]--> encode --[queue]--> upload
+   producer thread          calling thread       uploader thread
+```
+
+The producer pulls (id, document) records lazily (tokenization/chunking happens
+here if the records come from chunking.iter_chunks) and packs them into batches.
+The encoder runs in the calling thread so torch/CUDA stay where they were
+initialized. The uploader pushes finished batches to Chroma (or wherever) while
+the next batch encodes. Both queues are bounded, so memory is capped by
+`queue_depth` batches rather than by catalog size, and a slow stage throttles
+the ones upstream of it.
+"""
+
+import threading
+import numpy as np
+from itertools import batched
+from pydantic import BaseModel, Field
+from queue import Empty, Full, Queue
+from time import perf_counter
+from typing import Callable, Iterable, Optional
+from winnow.embeddings.batching import plan_batches
+
+_DONE = object()
+
+
+class IngestReport(BaseModel):
+    records: int = Field(default=0, description="Records encoded and uploaded")
+    batches: int = Field(default=0, description="Batches processed")
+    seconds: float = Field(default=0.0, description="Wall-clock time")
+    encode_seconds: float = Field(default=0.0, description="Time spent encoding")
+    encoder_wait_seconds: float = Field(
+        default=0.0, description="Time the encoder sat idle waiting on the source"
+    )
+    upload_seconds: float = Field(default=0.0, description="Time spent uploading")
+
+    def __str__(self) -> str:
+        rate = self.records / self.seconds if self.seconds else 0.0
+        return (
+            f"Ingested {self.records} records in {self.seconds:.1f}s ({rate:.1f}/s): "
+            f"encode {self.encode_seconds:.1f}s, encoder idle {self.encoder_wait_seconds:.1f}s, "
+            f"upload {self.upload_seconds:.1f}s."
+        )
+
+
+def chroma_uploader(
+    collection,
+    batch_size: int = 100,
+    metadata: Optional[Callable] = None,
+    max_bytes: Optional[int] = 8 * 1024**2,
+) -> Callable:
+    """
+    Upload stage for a Chroma collection: upserts in sub-batches of at most
+    `batch_size` records and (roughly) `max_bytes` of documents + vectors, so a
+    run of long transcripts doesn't produce one giant request.
+    metadata: optional callable document -> metadata dict (e.g. content hash).
+    """
+
+    def upload(ids: list[str], documents: list[str], embeddings: np.ndarray) -> None:
+        if max_bytes:
+            row_bytes = embeddings.shape[1] * 4 if embeddings.ndim == 2 else 0
+            sizes = [len(document) + row_bytes for document in documents]
+            plan = plan_batches(sizes, max_bytes, batch_size, padded=False)
+        else:
+            plan = [
+                list(range(i, min(i + batch_size, len(ids))))
+                for i in range(0, len(ids), batch_size)
+            ]
+        for batch in plan:
+            batch_documents = [documents[i] for i in batch]
+            collection.upsert(
+                ids=[ids[i] for i in batch],
+                documents=batch_documents,
+                embeddings=embeddings[batch[0] : batch[-1] + 1],
+                metadatas=(
+                    [metadata(document) for document in batch_documents]
+                    if metadata
+                    else None
+                ),
+            )
+
+    return upload
+
+
+def run_ingest(
+    records: Iterable[tuple[str, str]],
+    encode: Callable[[list[str]], np.ndarray],
+    upload: Callable[[list[str], list[str], np.ndarray], None],
+    batch_size: int = 256,
+    queue_depth: int = 4,
+    verbose: bool = True,
+) -> IngestReport:
+    """
+    Run the three stages concurrently until `records` is exhausted.
+    An exception in any stage stops the pipeline and is re-raised here.
+    """
+    report = IngestReport()
+    to_encode: Queue = Queue(maxsize=queue_depth)
+    to_upload: Queue = Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    # Blocking put/get that give up once another stage has failed.
+    def put(queue: Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def get(queue: Queue):
+        while not stop.is_set():
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                continue
+        return _DONE
+
+    def produce() -> None:
+        try:
+            for batch in batched(records, batch_size):
+                ids = [id for id, _ in batch]
+                documents = [document for _, document in batch]
+                if not put(to_encode, (ids, documents)):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(to_encode, _DONE)
+
+    def consume() -> None:
+        try:
+            while True:
+                item = get(to_upload)
+                if item is _DONE:
+                    return
+                start = perf_counter()
+                upload(*item)
+                report.upload_seconds += perf_counter() - start
+                report.records += len(item[0])
+                report.batches += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    start = perf_counter()
+    producer = threading.Thread(target=produce, name="ingest-source", daemon=True)
+    uploader = threading.Thread(target=consume, name="ingest-upload", daemon=True)
+    producer.start()
+    uploader.start()
+    try:
+        while True:
+            wait_start = perf_counter()
+            item = get(to_encode)
+            report.encoder_wait_seconds += perf_counter() - wait_start
+            if item is _DONE:
+                break
+            ids, documents = item
+            encode_start = perf_counter()
+            embeddings = np.asarray(encode(documents), dtype=np.float32)
+            report.encode_seconds += perf_counter() - encode_start
+            if not put(to_upload, (ids, documents, embeddings)):
+                break
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        put(to_upload, _DONE)
+        producer.join()
+        uploader.join()
+    report.seconds = perf_counter() - start
+    if errors:
+        raise errors[0]
+    if verbose:
+        print(report)
+    return report
@@ -0,0 +1,121 @@
+"""
+Matryoshka dimension sweep.
+
+MRL-trained models (stella_en_400M_v5, mxbai-embed-large-v1,
+snowflake-arctic-embed-m-v1.5, ...) keep most of their quality when embeddings
+are truncated to a prefix and renormalized. Going from 1024 to 256 dims cuts index
+memory 4x; this sweep tells us what it costs in recall.
+
+The corpus is encoded once at full size (through the embedding cache) and every
+smaller size is a truncation of those vectors, so the sweep costs one encoding
+pass no matter how many sizes are tested. Recall is reported against the
+full-dimension results, and against ground truth when it's given.
+"""
+
+import numpy as np
+from time import perf_counter
+from typing import Optional, Sequence
+from winnow.embeddings.backends import NumpyBackend
+from winnow.embeddings.embedding_cache import embedding_cache
+from winnow.embeddings.encoders import get_encoder, truncate_embeddings
+
+DEFAULT_DIMENSIONS = (8192, 4096, 2048, 1024, 768, 512, 256, 128, 64)
+
+
+def dimension_sweep(
+    model_name: str,
+    test_data: tuple[list, list],
+    queries: list[str],
+    dimensions: Sequence[int] = DEFAULT_DIMENSIONS,
+    k: int = 10,
+    ground_truth: Optional[dict[str, set[str]]] = None,
+    repeats: int = 5,
+    device: Optional[str] = None,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    Report recall, index size and query latency at each embedding size.
+
+    Args:
+        dimensions: sizes to test; those above the model's native size are
+            skipped with a notice (the native size is always included as the
+            reference, and every row records it as native_dimensions)
+        ground_truth: optional {query: set of relevant ids} for true recall@k
+        repeats: searches per size; latency is the best of these
+
+    Returns:
+        one dict per size: dimensions, native_dimensions, index_bytes,
+        query_latency_ms (per query), recall_vs_full and, with ground truth, recall.
+    """
+    ids, documents = test_data
+    encoder = get_encoder(model_name, device=device)
+    doc_embeddings = embedding_cache.embed(encoder.cache_key, documents, encoder)
+    query_embeddings = np.asarray(encoder(queries), dtype=np.float32)
+    full = doc_embeddings.shape[1]
+    sizes = sorted({full, *(d for d in dimensions if d < full)}, reverse=True)
+    skipped = sorted({d for d in dimensions if d > full}, reverse=True)
+    if skipped and verbose:
+        print(
+            f"{model_name}: skipping {', '.join(map(str, skipped))} "
+            f"(above the native {full} dimensions)."
+        )
+    reference: list[list[str]] = []
+    rows = []
+    for size in sizes:
+        backend = NumpyBackend(space="cosine")
+        backend.index(ids, truncate_embeddings(doc_embeddings, size))
+        truncated_queries = truncate_embeddings(query_embeddings, size)
+        timings = []
+        for _ in range(repeats):
+            start = perf_counter()
+            matches, _ = backend.search(truncated_queries, k=k)
+            timings.append(perf_counter() - start)
+        if not reference:
+            reference = matches
+        row = {
+            "model_name": model_name,
+            "dimensions": size,
+            "native_dimensions": full,
+            "index_bytes": backend.matrix.nbytes,
+            "query_latency_ms": min(timings) * 1000 / len(queries),
+            "recall_vs_full": float(
+                np.mean([len(set(m) & set(r)) / len(r) for m, r in zip(matches, reference)])
+            ),
+        }
+        if ground_truth:
+            recalls = [
+                len(set(m) & ground_truth[query]) / len(ground_truth[query])
+                for query, m in zip(queries, matches)
+                if ground_truth.get(query)
+            ]
+            row["recall"] = float(np.mean(recalls)) if recalls else None
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    from winnow.embeddings.chroma_main import generate_test_data
+
+    test_data = generate_test_data()
+    queries = [
+        "Kubernetes",
+        "Deep Learning with Python",
+        "Social Media Marketing",
+        "Sales Management",
+        "Generative AI for Business Analysts",
+        "CI/CD pipeline automation",
+        "European privacy laws",
+        "Legacy system maintenance",
+    ]
+    for model_name in [
+        "NovaSearch/stella_en_400M_v5",
+        "mixedbread-ai/mxbai-embed-large-v1",
+        "Snowflake/snowflake-arctic-embed-m-v1.5",
+    ]:
+        print(f"Dimension sweep: {model_name}")
+        print("======================================")
+        for row in dimension_sweep(model_name, test_data, queries):
+            print(
+                f"{row['dimensions']:>5}d | {row['index_bytes'] / 1024**2:8.1f} MB | "
+                f"{row['query_latency_ms']:7.3f} ms/query | recall vs full: {row['recall_vs_full']:.3f}"
+            )
@@ -0,0 +1,134 @@
+"""
+Appendable columnar store for sweep results (replaces all_results.pkl).
+
+Each model's results are written as soon as that model finishes, as one Parquet
+file in the store directory, one row per (model, query, rank):
+
+| model | query | rank | id | score | latency |
+
+A crash on model 19 therefore loses only model 19, `completed_models()` tells a
+re-run which models to skip, and `read()` pulls filtered slices (a few models, a
+few queries, a few columns) through pyarrow.dataset without loading everything.
+"""
+
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Optional, Sequence
+from winnow.embeddings.embedding_cache import model_slug
+
+dir_path = Path(__file__).parent
+DEFAULT_STORE_DIR = dir_path / "results"
+
+SCHEMA = pa.schema(
+    [
+        ("model", pa.string()),
+        ("query", pa.string()),
+        ("rank", pa.int32()),
+        ("id", pa.string()),
+        ("score", pa.float32()),
+        ("latency", pa.float32()),
+    ]
+)
+
+
+class ResultStore:
+    """
+    Directory of per-model Parquet files sharing one schema.
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+
+    def _path(self, model: str) -> Path:
+        return self.root / f"{model_slug(model)}.parquet"
+
+    def append(self, model: str, results: list[dict]) -> int:
+        """
+        Write one model's results ({"query", "match"[, "scores", "latency"]}).
+        Re-appending a model replaces its file. Returns the number of rows.
+        """
+        columns: dict[str, list] = {name: [] for name in SCHEMA.names}
+        for result in results:
+            scores = result.get("scores") or [None] * len(result["match"])
+            for rank, (id, score) in enumerate(zip(result["match"], scores)):
+                columns["model"].append(model)
+                columns["query"].append(result["query"])
+                columns["rank"].append(rank)
+                columns["id"].append(str(id))
+                columns["score"].append(score)
+                columns["latency"].append(result.get("latency"))
+        table = pa.table(columns, schema=SCHEMA)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(model)
+        tmp = path.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+        return table.num_rows
+
+    def completed_models(self) -> set[str]:
+        """
+        Models with results on disk (reads only the model column).
+        """
+        if not self.root.exists():
+            return set()
+        completed = set()
+        for path in self.root.glob("*.parquet"):
+            models = pq.read_table(path, columns=["model"]).column("model")
+            completed.update(models.unique().to_pylist())
+        return completed
+
+    def read(
+        self,
+        models: Optional[Sequence[str]] = None,
+        queries: Optional[Sequence[str]] = None,
+        max_rank: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """
+        Filtered slice of the store. Filters are pushed down to the Parquet
+        reader, so only matching row groups and requested columns are decoded.
+        """
+        if not self.root.exists() or not any(self.root.glob("*.parquet")):
+            return SCHEMA.empty_table()
+        dataset = ds.dataset(
+            [str(p) for p in sorted(self.root.glob("*.parquet"))],
+            schema=SCHEMA,
+            format="parquet",
+        )
+        expression = None
+        for condition in (
+            ds.field("model").isin(list(models)) if models is not None else None,
+            ds.field("query").isin(list(queries)) if queries is not None else None,
+            ds.field("rank") < max_rank if max_rank is not None else None,
+        ):
+            if condition is not None:
+                expression = condition if expression is None else expression & condition
+        return dataset.to_table(
+            columns=list(columns) if columns else None, filter=expression
+        )
+
+    def to_results(
+        self, models: Optional[Sequence[str]] = None
+    ) -> list[list[dict]]:
+        """
+        Back to the all_results.pkl shape (one list per model of
+        {"query", "match", "model"} dicts), e.g. for retrieval_metrics.evaluate.
+        """
+        table = self.read(models=models).sort_by(
+            [("model", "ascending"), ("query", "ascending"), ("rank", "ascending")]
+        )
+        grouped: dict[str, dict[str, dict]] = {}
+        for model, query, id in zip(
+            table.column("model").to_pylist(),
+            table.column("query").to_pylist(),
+            table.column("id").to_pylist(),
+        ):
+            queries = grouped.setdefault(model, {})
+            result = queries.setdefault(
+                query, {"query": query, "match": [], "model": model}
+            )
+            result["match"].append(id)
+        return [list(queries.values()) for queries in grouped.values()]
@@ -1,4 +1,5 @@
 from sentence_transformers import SentenceTransformer
+from winnow.embeddings.encoders import resolve_device
 
 # This model supports two prompts: "s2p_query" and "s2s_query" for sentence-to-passage and sentence-to-sentence tasks, respectively.
 # They are defined in `config_sentence_transformers.json`
@@ -14,15 +15,20 @@ docs = [
 ]
 
 # ！The default dimension is 1024, if you need other dimensions, please clone the model and modify `modules.json` to replace `2_Dense_1024` with another dimension, e.g. `2_Dense_256` or `2_Dense_8192` !
-# on gpu
-model = SentenceTransformer("dunzhang/stella_en_400M_v5", trust_remote_code=True).cuda()
-# you can also use this model without the features of `use_memory_efficient_attention` and `unpad_inputs`. It can be worked in CPU.
-# model = SentenceTransformer(
-#     "dunzhang/stella_en_400M_v5",
-#     trust_remote_code=True,
-#     device="cpu",
-#     config_kwargs={"use_memory_efficient_attention": False, "unpad_inputs": False}
-# )
+# For smaller sizes without touching `modules.json`, truncate instead: `get_encoder(..., dimensions=256)` (see encoders.py / matryoshka.py).
+# on gpu if there is one; otherwise without the features of `use_memory_efficient_attention` and `unpad_inputs`, which lets it work on CPU.
+device = resolve_device()
+if device == "cuda":
+    model = SentenceTransformer(
+        "dunzhang/stella_en_400M_v5", trust_remote_code=True, device=device
+    )
+else:
+    model = SentenceTransformer(
+        "dunzhang/stella_en_400M_v5",
+        trust_remote_code=True,
+        device=device,
+        config_kwargs={"use_memory_efficient_attention": False, "unpad_inputs": False},
+    )
 query_embeddings = model.encode(queries, prompt_name=query_prompt_name)
 doc_embeddings = model.encode(docs)
 print(query_embeddings.shape, doc_embeddings.shape)
@@ -0,0 +1,166 @@
+"""
+Process-isolated runner for the embedding model sweep.
+
+Each model runs `test_model` in its own spawned worker process, so its weights
+(and CUDA context) are released when the worker exits. Peak memory is bounded by
+`pool_size` models rather than growing with the model list. Results stream back
+as each model finishes, in the same status dict shape as llms/modeltest.py:
+
+```python
+{"model_name": ..., "status": "SUCCESS" | "FAIL", "output": ..., "duration": ...}
+```
+
+The per-worker memory ceiling is enforced from the parent by polling the worker's
+resident set size (Linux `/proc`), which unlike RLIMIT_AS doesn't trip over the
+huge virtual reservations CUDA makes.
+"""
+
+import multiprocessing as mp
+import os
+import pickle
+import tempfile
+import traceback
+from multiprocessing.connection import Connection, wait
+from time import time
+from typing import Iterator, Optional
+from winnow.utils import rss_bytes
+
+
+def _worker(
+    conn: Connection,
+    model_name: str,
+    data_path: str,
+    queries: list[str],
+    kwargs: dict,
+    threads: Optional[int],
+) -> None:
+    start = time()
+    try:
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        from winnow.embeddings.chroma_main import test_model
+
+        with open(data_path, "rb") as f:
+            test_data = pickle.load(f)
+        results = test_model(
+            model_name=model_name, test_data=test_data, queries=queries, **kwargs
+        )
+        for result in results:
+            result.update({"model": model_name})
+        conn.send(
+            {
+                "model_name": model_name,
+                "status": "SUCCESS",
+                "output": results,
+                "duration": time() - start,
+            }
+        )
+    except BaseException as e:
+        conn.send(
+            {
+                "model_name": model_name,
+                "status": "FAIL",
+                "output": "".join(traceback.format_exception_only(e)).strip(),
+                "duration": time() - start,
+            }
+        )
+    finally:
+        conn.close()
+
+
+def _failure(model_name: str, reason: str, start: float) -> dict:
+    return {
+        "model_name": model_name,
+        "status": "FAIL",
+        "output": reason,
+        "duration": time() - start,
+    }
+
+
+def run_sweep(
+    models: list[str],
+    test_data: tuple[list, list],
+    queries: list[str],
+    pool_size: int = 1,
+    memory_limit_gb: Optional[float] = None,
+    timeout: Optional[float] = None,
+    threads_per_worker: Optional[int] = None,
+    **test_model_kwargs,
+) -> Iterator[dict]:
+    """
+    Run test_model for each model in a worker process and yield status dicts as
+    models finish (not in list order).
+
+    Args:
+        pool_size: number of models running at once (1 on a single GPU; more on a
+            many-core CPU box for small models)
+        memory_limit_gb: kill a worker whose RSS exceeds this
+        timeout: kill a worker that runs longer than this many seconds
+        threads_per_worker: torch intra-op threads per worker; defaults to
+            cpu_count // pool_size so concurrent workers don't oversubscribe cores
+        test_model_kwargs: passed through to test_model (backend, chunk, ...)
+    """
+    if threads_per_worker is None and pool_size > 1:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // pool_size)
+    memory_limit = memory_limit_gb * 1024**3 if memory_limit_gb else None
+    ctx = mp.get_context("spawn")
+    # Workers read the corpus from disk rather than each getting a pickled copy
+    # through the process arguments.
+    with tempfile.NamedTemporaryFile(suffix=".pkl", delete=False) as f:
+        pickle.dump(test_data, f)
+        data_path = f.name
+    pending = list(models)
+    running: dict[Connection, tuple[str, mp.process.BaseProcess, float]] = {}
+    try:
+        while pending or running:
+            while pending and len(running) < pool_size:
+                model_name = pending.pop(0)
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                process = ctx.Process(
+                    target=_worker,
+                    args=(
+                        child_conn,
+                        model_name,
+                        data_path,
+                        queries,
+                        test_model_kwargs,
+                        threads_per_worker,
+                    ),
+                    daemon=True,
+                )
+                process.start()
+                child_conn.close()
+                running[parent_conn] = (model_name, process, time())
+            for conn in wait(list(running), timeout=1.0):
+                model_name, process, start = running.pop(conn)
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    process.join()
+                    result = _failure(
+                        model_name, f"Worker died (exit code {process.exitcode}).", start
+                    )
+                conn.close()
+                process.join()
+                yield result
+            for conn, (model_name, process, start) in list(running.items()):
+                reason = None
+                if timeout and time() - start > timeout:
+                    reason = f"Timed out after {timeout:.0f}s."
+                elif memory_limit:
+                    rss = rss_bytes(process.pid)
+                    if rss and rss > memory_limit:
+                        reason = f"Exceeded memory limit ({rss / 1024**3:.1f} GB RSS)."
+                if reason:
+                    process.kill()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    yield _failure(model_name, reason, start)
+    finally:
+        for conn, (_, process, _) in running.items():
+            process.kill()
+            conn.close()
+        os.unlink(data_path)
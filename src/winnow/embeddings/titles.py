@@ -0,0 +1,150 @@
+"""
+Bulk course-title lookup for printing sweep results.
+
+Printing a sweep used to call `get_course_title` once per match: models x queries
+x k separate database round trips, most of them for the same few hundred
+courses. `TitleResolver` collects every id in a result set, fetches the missing
+ones in a single bulk call, and keeps them in an LRU cache shared across models.
+
+Ids the catalog doesn't cover (or courses without a title attribute) go to an
+optional `fallback` bulk fetch, once per resolve with all of them together.
+`bulk_lookup` turns a one-id-at-a-time lookup like `get_course_title` into such a
+fetch by running the lookups concurrently.
+
+```python
+titles = TitleResolver.from_courses(
+    get_all_courses_sync(), fallback=bulk_lookup(get_course_title)
+)
+for result in results:
+    for match, title in titles.resolve(result["match"]).items():
+        ...
+```
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+# Course models have carried the title under both names.
+TITLE_ATTRIBUTES = ("course_title", "title")
+
+
+def course_title(course) -> Optional[str]:
+    for attribute in TITLE_ATTRIBUTES:
+        title = getattr(course, attribute, None)
+        if title:
+            return title
+    return None
+
+
+def bulk_lookup(
+    get_title: Callable[[int], str], max_workers: int = 8
+) -> Callable[[list[str]], dict[str, str]]:
+    """
+    fetch_many over a one-id-at-a-time lookup like `get_course_title`: the ids
+    are looked up concurrently, and ids whose lookup fails are left out.
+    """
+
+    def lookup(id: str) -> Optional[str]:
+        try:
+            return get_title(int(id))
+        except Exception:
+            return None
+
+    def fetch_many(ids: list[str]) -> dict[str, str]:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            titles = dict(zip(ids, pool.map(lookup, ids)))
+        return {id: title for id, title in titles.items() if title is not None}
+
+    return fetch_many
+
+
+class TitleResolver:
+    """
+    LRU cache of course id -> title in front of a bulk fetch.
+
+    Args:
+        fetch_many: callable taking a list of ids and returning {id: title} for
+            those it knows. Ids it doesn't return are cached as unknown (None).
+        maxsize: number of ids to keep.
+    """
+
+    def __init__(
+        self,
+        fetch_many: Callable[[list[str]], dict[str, str]],
+        maxsize: int = 100_000,
+    ):
+        self.fetch_many = fetch_many
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, Optional[str]] = OrderedDict()
+        self.fetches = 0
+
+    @classmethod
+    def from_courses(
+        cls,
+        courses: Iterable,
+        fallback: Optional[Callable[[list[str]], dict[str, str]]] = None,
+        **kwargs,
+    ) -> "TitleResolver":
+        """
+        Resolver over an already-loaded catalog. Ids it doesn't have a title for
+        go to `fallback` (if given) in a single call per resolve.
+        """
+        catalog = {}
+        for course in courses:
+            title = course_title(course)
+            if title is not None:
+                catalog[str(course.course_admin_id)] = title
+
+        def fetch_many(ids: list[str]) -> dict[str, str]:
+            titles = {id: catalog[id] for id in ids if id in catalog}
+            leftover = [id for id in ids if id not in titles]
+            if leftover and fallback is not None:
+                titles |= fallback(leftover)
+            return titles
+
+        return cls(fetch_many, **kwargs)
+
+    @classmethod
+    def from_lookup(
+        cls, get_title: Callable[[int], str], max_workers: int = 8, **kwargs
+    ) -> "TitleResolver":
+        """
+        Resolver over a one-id-at-a-time lookup like `get_course_title`: each
+        resolve looks its misses up concurrently, and each id only once.
+        """
+        return cls(bulk_lookup(get_title, max_workers), **kwargs)
+
+    def resolve(self, ids: Iterable) -> dict[str, Optional[str]]:
+        """
+        {id: title or None} for every id, in first-seen order. Cache misses are
+        fetched together in one call.
+        """
+        ids = list(dict.fromkeys(str(id) for id in ids))
+        missing = [id for id in ids if id not in self._cache]
+        if missing:
+            self.fetches += 1
+            try:
+                fetched = self.fetch_many(missing)
+            except Exception as e:
+                # Leave the misses uncached so a later call can retry.
+                print(f"Couldn't retrieve course titles for {len(missing)} ids: {e}")
+                return {id: self._cache.get(id) for id in ids}
+            for id in missing:
+                self._cache[id] = fetched.get(id)
+        titles = {}
+        for id in ids:
+            self._cache.move_to_end(id)
+            titles[id] = self._cache[id]
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return titles
+
+    def resolve_results(self, results: list[dict]) -> dict[str, Optional[str]]:
+        """
+        Titles for every match in a list of {"query", "match"} results.
+        """
+        return self.resolve(id for result in results for id in result["match"])
+
+    def __getitem__(self, id) -> Optional[str]:
+        return self.resolve([id])[str(id)]
@@ -3,12 +3,28 @@ from kramer.database.MongoDB_certs import get_all_certs
 from conduit.sync import Conduit, Model, Prompt
 from conduit.parser.parser import Parser
 from conduit.batch import ModelAsync, AsyncConduit
+from winnow.evaluation.curation_rubric.rubric_cache import (
+    RubricCache,
+    rubric_cache,
+    rubric_key,
+)
+from winnow.utils import estimate_tokens
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, SerializeAsAny
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from time import perf_counter
+from typing import AsyncIterator, Callable, Container, Iterable, Optional
+import asyncio
+import json
 
 dir_path = Path(__file__).parent
-template_files = dir_path.glob("*.jinja2")
+template_files = sorted(dir_path.glob("*.jinja2"))
+template_names = [template_file.stem for template_file in template_files]
 template_strings = [template_file.read_text() for template_file in template_files]
+# Every dimension template ends with the same curation block, starting here.
+CURATION_MARKER = "**Curation to Evaluate:**"
 
 
 class CurationRubric(BaseModel):
@@ -17,31 +33,201 @@ class CurationRubric(BaseModel):
     rationale: str = Field(description="A brief justification for the score given")
 
 
+class CurationRubrics(BaseModel):
+    rubrics: list[CurationRubric] = Field(
+        description="One rubric per dimension, in the order the dimensions are given"
+    )
+
+
+class RubricCallReport(BaseModel):
+    mode: str = Field(description="combined, fallback (combined failed) or cached")
+    requests: int = Field(default=0, description="Requests sent")
+    prompt_tokens: int = Field(default=0, description="Estimated input tokens sent")
+    per_dimension_prompt_tokens: int = Field(
+        default=0, description="Estimated input tokens the per-dimension path sends"
+    )
+    seconds: float = Field(default=0.0, description="Wall-clock time")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.mode}: {self.requests} requests, ~{self.prompt_tokens} prompt tokens "
+            f"(per-dimension: ~{self.per_dimension_prompt_tokens}), {self.seconds:.1f}s"
+        )
+
+
+class CurationEvaluation(BaseModel):
+    title: str = Field(description="Title of the curation that was scored")
+    rubrics: list[CurationRubric] = Field(default_factory=list)
+    final_score: Optional[float] = Field(
+        default=None, description="Mean dimension score (None if any dimension failed)"
+    )
+    error: Optional[str] = Field(default=None, description="First failure, if any")
+
+
+class RubricResult(BaseModel):
+    cert: str = Field(description="Title of the curation")
+    cert_index: int = Field(description="Position of the curation in the input")
+    dimension: str = Field(description="Template the rubric came from")
+    # SerializeAsAny: scorers may return subclasses (e.g. TieredRubric), whose
+    # extra fields would otherwise be dropped when the result is written out.
+    rubric: Optional[SerializeAsAny[CurationRubric]] = None
+    error: Optional[str] = Field(default=None, description="Why the prompt failed")
+    seconds: float = Field(default=0.0, description="Time from submit to result")
+
+
+def curation_variables(curation: Curation) -> dict:
+    """
+    Input variables the dimension templates expect.
+    """
+    return {
+        "curation_title": curation.title,
+        "duration": curation.duration,
+        "snapshot": curation.TOCs,
+    }
+
+
+def combined_template(templates: list[str] = template_strings) -> Optional[str]:
+    """
+    One prompt covering every dimension: each template's instructions, then the
+    curation block once. None if a template doesn't have the shared curation
+    block (it can't be folded in).
+    """
+    if not templates or any(CURATION_MARKER not in t for t in templates):
+        return None
+    sections = [
+        f"## Dimension {number} of {len(templates)}\n\n"
+        + template.split(CURATION_MARKER)[0].strip()
+        for number, template in enumerate(templates, start=1)
+    ]
+    curation_block = CURATION_MARKER + templates[0].split(CURATION_MARKER)[1]
+    curation_block = curation_block.rsplit("</curation>", 1)[0] + "</curation>"
+    return "\n\n".join(
+        [
+            f"You will evaluate one curation on {len(templates)} separate rubric "
+            "dimensions. Each dimension below has its own instructions and scoring "
+            "scale; score each one independently, as if it were the only one.",
+            *sections,
+            curation_block,
+            f"Now, please evaluate the provided curation on all {len(templates)} "
+            "dimensions and return one rubric per dimension, in the order given.",
+        ]
+    )
+
+
+def score_combined(
+    curation: Curation,
+    preferred_model: str,
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+) -> tuple[list[CurationRubric], RubricCallReport]:
+    """
+    All dimensions in one structured-output request. Falls back to per-dimension
+    requests if the templates can't be combined or the response doesn't parse
+    into one rubric per dimension.
+    """
+    start = perf_counter()
+    input_variables = curation_variables(curation)
+    per_dimension = [
+        Prompt(t).render(input_variables=input_variables) for t in template_strings
+    ]
+    report = RubricCallReport(
+        mode="combined",
+        per_dimension_prompt_tokens=sum(map(estimate_tokens, per_dimension)),
+    )
+    template_string = combined_template()
+    rubrics = None
+    if template_string is not None:
+        key = rubric_key(template_string, input_variables, preferred_model, CurationRubrics)
+        cached = cache.get(key, CurationRubrics) if cache is not None else None
+        if cached is not None:
+            report.mode = "cached"
+            rubrics = cached.rubrics
+        else:
+            prompt = Prompt(template_string)
+            report.requests += 1
+            report.prompt_tokens += estimate_tokens(
+                prompt.render(input_variables=input_variables)
+            )
+            try:
+                conduit = Conduit(
+                    prompt=prompt,
+                    model=Model(preferred_model),
+                    parser=Parser(CurationRubrics),  # type: ignore
+                )
+                response = conduit.run(  # type: ignore
+                    input_variables=input_variables, cache=False, verbose=verbose
+                )
+                if (
+                    isinstance(response.content, CurationRubrics)
+                    and len(response.content.rubrics) == len(template_strings)
+                ):
+                    rubrics = response.content.rubrics
+                    if cache is not None:
+                        cache.put(key, preferred_model, response.content)
+            except Exception as e:
+                if verbose:
+                    print(f"Combined rubric request failed ({e}); scoring per dimension.")
+    if rubrics is None:
+        report.mode = "fallback"
+        rubrics = []
+        for template_string, rendered in zip(template_strings, per_dimension):
+            rubrics.append(
+                score_dimension(template_string, curation, preferred_model, verbose, cache)
+            )
+            report.requests += 1
+            report.prompt_tokens += estimate_tokens(rendered)
+    report.seconds = perf_counter() - start
+    return rubrics, report
+
+
+def compare_modes(curation: Curation, preferred_model: str = "gpt-4o") -> dict:
+    """
+    Score one curation both ways (uncached) and report tokens and latency for each.
+    """
+    start = perf_counter()
+    per_dimension = [
+        score_dimension(t, curation, preferred_model, cache=None)
+        for t in template_strings
+    ]
+    per_dimension_seconds = perf_counter() - start
+    combined, report = score_combined(curation, preferred_model, cache=None)
+    return {
+        "dimensions": len(template_strings),
+        "per_dimension_seconds": per_dimension_seconds,
+        "combined_seconds": report.seconds,
+        "per_dimension_prompt_tokens": report.per_dimension_prompt_tokens,
+        "combined_prompt_tokens": report.prompt_tokens,
+        "combined_mode": report.mode,
+        "score_deltas": [
+            c.score - p.score for c, p in zip(combined, per_dimension)
+        ],
+    }
+
+
 def evaluate_curation(
-    curation: Curation, preferred_model: str = "claude", verbose=True
+    curation: Curation,
+    preferred_model: str = "claude",
+    verbose=True,
+    cache: Optional[RubricCache] = rubric_cache,
+    combined: bool = False,
 ) -> tuple[list[CurationRubric], float]:
     """
     Evaluation function for curation.
+    Dimensions already scored for this template, snapshot and model come from the
+    rubric cache (pass cache=None to force fresh calls).
+    combined: score every dimension in a single request (see score_combined).
     """
-    # Load the template strings
-    dimension_prompts = [
-        Prompt(template_string) for template_string in template_strings
-    ]
-    curation_rubrics = []
-    for index, dimension_prompt in enumerate(dimension_prompts):
-        model = Model(preferred_model)
-        parser = Parser(CurationRubric)  # type: ignore
-        conduit = Conduit(prompt=dimension_prompt, model=model, parser=parser)
-        response = conduit.run(  # type: ignore
-            input_variables={
-                "curation_title": curation.title,
-                "duration": curation.duration,
-                "snapshot": curation.TOCs,
-            },
-            cache=False,
-            verbose=verbose,
+    if combined:
+        curation_rubrics, report = score_combined(
+            curation, preferred_model, verbose, cache
         )
-        curation_rubrics.append(response.content)
+        if verbose:
+            print(report)
+    else:
+        curation_rubrics = [
+            score_dimension(template_string, curation, preferred_model, verbose, cache)
+            for template_string in template_strings
+        ]
     overall_score = 0
     for curation_rubric in curation_rubrics:
         dimension = curation_rubric.dimension
@@ -56,35 +242,43 @@ def evaluate_curation(
 
 
 def evaluate_curation_async(
-    curation: Curation, preferred_model: str = "o3-mini", verbose=True
+    curation: Curation,
+    preferred_model: str = "o3-mini",
+    verbose=True,
+    cache: Optional[RubricCache] = rubric_cache,
 ) -> tuple[list[CurationRubric], float]:
     """
     Evaluation function for curation.
+    Only dimensions missing from the rubric cache are sent.
     """
-    # Load the template strings
-    dimension_prompts = [
-        Prompt(template_string) for template_string in template_strings
+    input_variables = curation_variables(curation)
+    keys = [
+        rubric_key(template_string, input_variables, preferred_model, CurationRubric)
+        for template_string in template_strings
     ]
+    cached = [
+        cache.get(key, CurationRubric) if cache is not None else None for key in keys
+    ]
+    missing = [index for index, rubric in enumerate(cached) if rubric is None]
     # Render the prompts with the input variables
     prompt_strings = [
-        prompt.render(
-            input_variables={
-                "curation_title": curation.title,
-                "duration": curation.duration,
-                "snapshot": curation.TOCs,
-            }
-        )
-        for prompt in dimension_prompts
+        Prompt(template_strings[index]).render(input_variables=input_variables)
+        for index in missing
     ]
     # Run our list of prompt strings through async
-    model = ModelAsync(preferred_model)
-    parser = Parser(CurationRubric)  # type: ignore
-    conduit = AsyncConduit(model=model, parser=parser)
-    responses = conduit.run(
-        prompt_strings=prompt_strings, verbose=verbose, cache=False
-    )  # Type: ignore
+    if prompt_strings:
+        model = ModelAsync(preferred_model)
+        parser = Parser(CurationRubric)  # type: ignore
+        conduit = AsyncConduit(model=model, parser=parser)
+        responses = conduit.run(
+            prompt_strings=prompt_strings, verbose=verbose, cache=False
+        )  # Type: ignore
+        for index, response in zip(missing, responses):
+            cached[index] = response.content
+            if cache is not None:
+                cache.put(keys[index], preferred_model, response.content)
     # Process the curation_rubrics
-    curation_rubrics = [response.content for response in responses]
+    curation_rubrics = cached
     overall_score = 0
     for curation_rubric in curation_rubrics:
         dimension = curation_rubric.dimension
@@ -98,21 +292,256 @@ def evaluate_curation_async(
         return curation_rubrics, final_score
 
 
-if __name__ == "__main__":
-    certs = get_all_certs()
-    for index, cert in enumerate(certs):
-        curation_rubrics, final_score = evaluate_curation_async(
-            cert, preferred_model="gpt-4o", verbose=False
+def score_dimension(
+    template_string: str,
+    curation: Curation,
+    preferred_model: str,
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+) -> CurationRubric:
+    """
+    One (curation, dimension) prompt through the sync Conduit, or from the cache.
+    """
+    input_variables = curation_variables(curation)
+    key = rubric_key(template_string, input_variables, preferred_model, CurationRubric)
+    if cache is not None:
+        cached = cache.get(key, CurationRubric)
+        if cached is not None:
+            return cached
+    conduit = Conduit(
+        prompt=Prompt(template_string),
+        model=Model(preferred_model),
+        parser=Parser(CurationRubric),  # type: ignore
+    )
+    response = conduit.run(  # type: ignore
+        input_variables=input_variables, cache=False, verbose=verbose
+    )
+    if cache is not None:
+        cache.put(key, preferred_model, response.content)
+    return response.content
+
+
+async def evaluate_curations_async(
+    curations: list[Curation],
+    preferred_model: str = "gpt-4o",
+    concurrency: int = 16,
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+    combined: bool = False,
+    scorer: Optional[Callable[..., CurationRubric]] = None,
+) -> list[CurationEvaluation]:
+    """
+    Score many curations at once. Every (curation, dimension) prompt goes into one
+    pool with at most `concurrency` requests in flight, so the catalog takes about
+    as long as its slowest requests rather than the sum of all of them.
+    With combined=True each curation is one request instead (see score_combined).
+    scorer replaces score_dimension for per-dimension jobs (same arguments), e.g.
+    rubric_cascade.score_dimension_cascade.
+    Results come back in input order, one CurationEvaluation per curation; a
+    failed prompt marks its curation with the error instead of stopping the run.
+    """
+    if combined:
+        jobs = [
+            (index, partial(score_combined, curation, preferred_model, verbose, cache))
+            for index, curation in enumerate(curations)
+        ]
+    else:
+        jobs = [
+            (
+                index,
+                partial(
+                    scorer or score_dimension,
+                    template_string,
+                    curation,
+                    preferred_model,
+                    verbose,
+                    cache,
+                ),
+            )
+            for index, curation in enumerate(curations)
+            for template_string in template_strings
+        ]
+    loop = asyncio.get_running_loop()
+    # Conduit is blocking, so requests run on threads; the pool size is the limit.
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = await asyncio.gather(
+            *(loop.run_in_executor(pool, job) for _, job in jobs),
+            return_exceptions=True,
+        )
+    evaluations = [CurationEvaluation(title=curation.title) for curation in curations]
+    for (index, _), outcome in zip(jobs, outcomes):
+        evaluation = evaluations[index]
+        if isinstance(outcome, BaseException):
+            evaluation.error = evaluation.error or repr(outcome)
+        elif combined:
+            evaluation.rubrics.extend(outcome[0])
+        else:
+            evaluation.rubrics.append(outcome)
+    for evaluation in evaluations:
+        if evaluation.error is None and evaluation.rubrics:
+            evaluation.final_score = sum(r.score for r in evaluation.rubrics) / len(
+                evaluation.rubrics
+            )
+    return evaluations
+
+
+def evaluate_curations(
+    curations: list[Curation],
+    preferred_model: str = "gpt-4o",
+    concurrency: int = 16,
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+    combined: bool = False,
+    scorer: Optional[Callable[..., CurationRubric]] = None,
+) -> list[CurationEvaluation]:
+    """
+    Blocking wrapper around evaluate_curations_async.
+    """
+    return asyncio.run(
+        evaluate_curations_async(
+            curations, preferred_model, concurrency, verbose, cache, combined, scorer
+        )
+    )
+
+
+async def stream_curation_rubrics(
+    curations: Iterable[Curation],
+    preferred_model: str = "gpt-4o",
+    concurrency: int = 16,
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+    scorer: Optional[Callable[..., CurationRubric]] = None,
+    skip: Container[tuple[str, str]] = frozenset(),
+) -> AsyncIterator[RubricResult]:
+    """
+    Yield each (curation, dimension) result as soon as it's done, in completion
+    order. Curations are pulled lazily and at most `concurrency` prompts are in
+    flight, so memory stays flat however long the catalog is.
+    Failures are yielded with `error` set rather than raised.
+    skip: (cert title, dimension) pairs to leave out, e.g. JsonlSink.completed().
+    """
+    scorer = scorer or score_dimension
+    jobs = (
+        (index, curation, name, template_string)
+        for index, curation in enumerate(curations)
+        for name, template_string in zip(template_names, template_strings)
+        if (curation.title, name) not in skip
+    )
+    loop = asyncio.get_running_loop()
+    pending: dict[asyncio.Future, tuple] = {}
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    def submit(job: tuple) -> None:
+        index, curation, name, template_string = job
+        future = loop.run_in_executor(
+            pool,
+            scorer,
+            template_string,
+            curation,
+            preferred_model,
+            verbose,
+            cache,
         )
-        print("----------------------------")
-        print(cert.title)
-        print(f"Final Score: {final_score:.2f}")
-        print("----------------------------")
-        for curation_rubric in curation_rubrics:
-            dimension = curation_rubric.dimension
-            score = curation_rubric.score
-            rationale = curation_rubric.rationale
-            print(f"Dimension: {dimension}")
-            print(f"Score: {score}")
-            print(f"Rationale: {rationale}")
-            print("----------------------------")
+        pending[future] = (index, curation.title, name, perf_counter())
+
+    try:
+        for job in islice(jobs, concurrency):
+            submit(job)
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index, title, name, start = pending.pop(future)
+                result = RubricResult(
+                    cert=title,
+                    cert_index=index,
+                    dimension=name,
+                    seconds=perf_counter() - start,
+                )
+                if future.exception() is not None:
+                    result.error = repr(future.exception())
+                else:
+                    result.rubric = future.result()
+                next_job = next(jobs, None)
+                if next_job is not None:
+                    submit(next_job)
+                yield result
+    finally:
+        # The consumer stopped early (or we failed): drop what's still queued
+        # without blocking the event loop on requests already in flight.
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class JsonlSink:
+    """
+    Appends RubricResults to a JSONL file as they arrive, one flushed line each,
+    so a crash loses at most the line being written.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+
+    def write(self, result: RubricResult) -> None:
+        with open(self.path, "a+b") as f:
+            # Don't glue the new line onto a line cut off by a crash.
+            if f.seek(0, 2):
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(result.model_dump_json().encode() + b"\n")
+
+    def read(
+        self, rubric_schema: type[CurationRubric] = CurationRubric
+    ) -> list[RubricResult]:
+        """
+        Every complete line. Pass the scorer's rubric type (e.g. TieredRubric)
+        as `rubric_schema` to get its extra fields back.
+        """
+        if not self.path.exists():
+            return []
+        results = []
+        for line in self.path.read_text().splitlines():
+            try:
+                result = RubricResult.model_validate_json(line)
+                if result.rubric is not None and rubric_schema is not CurationRubric:
+                    result.rubric = rubric_schema.model_validate(
+                        json.loads(line)["rubric"]
+                    )
+            except ValueError:
+                continue  # A line cut off by a crash.
+            results.append(result)
+        return results
+
+    def completed(self) -> set[tuple[str, str]]:
+        """
+        (cert, dimension) pairs already scored successfully, to pass as `skip`.
+        """
+        return {
+            (result.cert, result.dimension)
+            for result in self.read()
+            if result.error is None
+        }
+
+
+if __name__ == "__main__":
+
+    async def main() -> None:
+        # Results stream to disk; a re-run only scores what's missing or failed.
+        sink = JsonlSink(dir_path / "rubric_results.jsonl")
+        completed = sink.completed()
+        if completed:
+            print(f"Resuming: {len(completed)} rubrics already scored.")
+        async for result in stream_curation_rubrics(
+            get_all_certs(), preferred_model="gpt-4o", concurrency=16, skip=completed
+        ):
+            sink.write(result)
+            if result.error:
+                print(f"{result.cert} [{result.dimension}]: failed: {result.error}")
+            else:
+                print(
+                    f"{result.cert} [{result.dimension}]: {result.rubric.score} "
+                    f"({result.seconds:.1f}s) {result.rubric.rationale}"
+                )
+
+    asyncio.run(main())
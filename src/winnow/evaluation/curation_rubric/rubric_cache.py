@@ -0,0 +1,104 @@
+"""
+Content-addressed cache for rubric results.
+
+Conduit's `.cache.db` keys on the request it sends, and the rubric functions
+turn it off anyway, so every run re-scores every cert. Here a parsed result is
+stored under a hash of everything that can change it:
+
+    (template content, curation snapshot, model name, parser schema)
+
+Editing a dimension*.jinja2 file, changing a cert's TOCs, switching models or
+changing the CurationRubric fields each produce a new key, so stale results are
+never served and nothing needs invalidating by hand. Re-scoring an unchanged
+catalog is all hits.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from pydantic import BaseModel
+from typing import Optional, Type, TypeVar
+from winnow.embeddings.embedding_cache import content_hash
+
+dir_path = Path(__file__).parent
+DEFAULT_CACHE_PATH = dir_path / ".rubric_cache.db"
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def snapshot_hash(input_variables: dict) -> str:
+    return content_hash(json.dumps(input_variables, sort_keys=True, default=str))
+
+
+def schema_hash(schema: Type[BaseModel]) -> str:
+    return content_hash(json.dumps(schema.model_json_schema(), sort_keys=True))
+
+
+def rubric_key(
+    template_string: str,
+    input_variables: dict,
+    model_name: str,
+    schema: Type[BaseModel],
+) -> str:
+    return content_hash(
+        "\n".join(
+            [
+                content_hash(template_string),
+                snapshot_hash(input_variables),
+                model_name,
+                schema_hash(schema),
+            ]
+        )
+    )
+
+
+class RubricCache:
+    """
+    SQLite key -> JSON of a parsed pydantic result.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rubrics (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    result TEXT NOT NULL
+                )
+                """
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get(self, key: str, schema: Type[T]) -> Optional[T]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM rubrics WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return schema.model_validate_json(row[0])
+
+    def put(self, key: str, model_name: str, result: BaseModel) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rubrics VALUES (?, ?, ?)",
+                (key, model_name, result.model_dump_json()),
+            )
+
+
+rubric_cache = RubricCache()
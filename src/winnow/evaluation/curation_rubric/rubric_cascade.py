@@ -0,0 +1,148 @@
+"""
+Cheap-first rubric judging.
+
+A local model scores each (curation, dimension) a few times. Only when its
+verdict is uncertain does the dimension go to the expensive model:
+
+- the mean cheap score falls inside `band` (the middle of the 1-5 scale, where
+  a cheap judge is least trustworthy), or
+- the cheap samples disagree by more than `max_spread` points.
+
+Clear calls (a consistent 1 or 5, or a consistent 4 with the default band) stay
+with the cheap tier. If a cheap call fails (local server down, unparseable
+output), the dimension goes to the expensive model as a "fallback". Every
+rubric is tagged with the tier that decided it, and `tier_counts` summarizes
+how many escalations a run took.
+
+```python
+scorer = partial(score_dimension_cascade, cheap_model="llama3.1:latest")
+evaluations = evaluate_curations(certs, preferred_model="gpt-4o", scorer=scorer)
+print(tier_counts(evaluations))
+```
+"""
+
+from collections import Counter
+from kramer.courses.Curation import Curation
+from pydantic import Field
+from typing import Literal, Optional
+from winnow.evaluation.curation_rubric.curation_rubric import (
+    CurationEvaluation,
+    CurationRubric,
+    curation_variables,
+    score_dimension,
+)
+from winnow.evaluation.curation_rubric.rubric_cache import (
+    RubricCache,
+    rubric_cache,
+    rubric_key,
+)
+
+Tier = Literal["cheap", "expensive", "fallback"]
+
+
+class TieredRubric(CurationRubric):
+    tier: Tier = Field(description="Which model tier decided this score")
+    cheap_scores: list[int] = Field(
+        default_factory=list, description="The cheap model's sampled scores"
+    )
+    cheap_error: Optional[str] = Field(
+        default=None, description="Why the cheap tier failed (fallback tier only)"
+    )
+
+
+def needs_escalation(
+    scores: list[int], band: tuple[float, float], max_spread: int
+) -> bool:
+    mean = sum(scores) / len(scores)
+    return band[0] <= mean <= band[1] or max(scores) - min(scores) > max_spread
+
+
+def score_dimension_cascade(
+    template_string: str,
+    curation: Curation,
+    preferred_model: str = "gpt-4o",
+    verbose=False,
+    cache: Optional[RubricCache] = rubric_cache,
+    cheap_model: str = "llama3.1:latest",
+    samples: int = 3,
+    band: tuple[float, float] = (2.5, 3.5),
+    max_spread: int = 1,
+) -> TieredRubric:
+    """
+    Score one dimension with `cheap_model` (`samples` independent calls) and
+    escalate to `preferred_model` only if the cheap verdict is uncertain.
+    Same leading arguments as score_dimension, so it can be passed as the
+    `scorer` to evaluate_curations.
+    """
+    # The decision depends on the cascade settings, so they're part of the key.
+    judge = f"cascade:{cheap_model}x{samples}>{preferred_model}:{band}:{max_spread}"
+    key = rubric_key(template_string, curation_variables(curation), judge, TieredRubric)
+    if cache is not None:
+        cached = cache.get(key, TieredRubric)
+        if cached is not None:
+            return cached
+    # Samples must be fresh calls: cached ones would always agree.
+    try:
+        cheap = [
+            score_dimension(template_string, curation, cheap_model, verbose, cache=None)
+            for _ in range(samples)
+        ]
+    except Exception as e:
+        decided = score_dimension(
+            template_string, curation, preferred_model, verbose, cache
+        )
+        # Not cached under the cascade key: the cheap failure may be transient.
+        return TieredRubric(**decided.model_dump(), tier="fallback", cheap_error=repr(e))
+    scores = [rubric.score for rubric in cheap]
+    if needs_escalation(scores, band, max_spread):
+        decided = score_dimension(
+            template_string, curation, preferred_model, verbose, cache
+        )
+        tier: Tier = "expensive"
+    else:
+        # The median sample: a real response whose rationale matches its score.
+        decided = sorted(cheap, key=lambda rubric: rubric.score)[(samples - 1) // 2]
+        tier = "cheap"
+    result = TieredRubric(**decided.model_dump(), tier=tier, cheap_scores=scores)
+    if cache is not None:
+        cache.put(key, judge, result)
+    return result
+
+
+def tier_counts(evaluations: list[CurationEvaluation]) -> Counter:
+    """
+    How many dimensions each tier decided across a run.
+    """
+    return Counter(
+        getattr(rubric, "tier", "expensive")
+        for evaluation in evaluations
+        for rubric in evaluation.rubrics
+    )
+
+
+if __name__ == "__main__":
+    from functools import partial
+    from kramer.database.MongoDB_certs import get_all_certs
+    from winnow.evaluation.curation_rubric.curation_rubric import evaluate_curations
+
+    certs = get_all_certs()
+    evaluations = evaluate_curations(
+        certs,
+        preferred_model="gpt-4o",
+        concurrency=4,
+        scorer=partial(score_dimension_cascade, cheap_model="llama3.1:latest"),
+    )
+    counts = tier_counts(evaluations)
+    total = sum(counts.values())
+    escalated = counts["expensive"] + counts["fallback"]
+    print(
+        f"{total} dimensions scored: {counts['cheap']} by the cheap tier, "
+        f"{escalated} escalated ({escalated / max(total, 1):.0%}, "
+        f"{counts['fallback']} after a cheap-tier failure)."
+    )
+    for evaluation in evaluations:
+        if evaluation.error:
+            print(f"{evaluation.title}: failed: {evaluation.error}")
+            continue
+        tiers = ", ".join(f"{r.score} ({r.tier})" for r in evaluation.rubrics)
+        print(f"{evaluation.title}: {evaluation.final_score:.2f} [{tiers}]")
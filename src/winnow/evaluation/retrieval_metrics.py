@@ -0,0 +1,215 @@
+"""
+Retrieval metrics over embedding sweep results.
+
+Replaces the nested "count `match in test_matches`" loop from embeddings/README.md
+with integer-array operations over every model and query at once:
+
+1. ids are mapped to integers and each model's ranked matches become one row of a
+   (models, queries, k) array (padded with -1);
+2. ground truth becomes a (queries, vocabulary) boolean relevance matrix;
+3. fancy-indexing one into the other gives a (models, queries, k) hit array,
+   from which recall@k, precision@k, MRR and nDCG@k are reductions.
+
+Bootstrap confidence intervals resample queries for all models in one shot.
+
+Ground truth uses the README's format, one object per query:
+```json
+{"query": ..., "matches": [...]}
+```
+"""
+
+import json
+import pickle
+import numpy as np
+from pathlib import Path
+from typing import Optional, Sequence
+
+METRICS = ("recall", "precision", "mrr", "ndcg")
+
+
+def load_ground_truth(
+    path: Path | str, title_to_id: Optional[dict[str, str]] = None
+) -> dict[str, list[str]]:
+    """
+    Read {"query", "matches"} records from a .json list or .jsonl file.
+    If the matches are course titles, pass `title_to_id` to translate them to the
+    ids the sweep returns (unknown titles are dropped).
+    """
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix == ".jsonl":
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        records = json.loads(text)
+    ground_truth = {}
+    for record in records:
+        matches = [str(match) for match in record["matches"]]
+        if title_to_id is not None:
+            matches = [title_to_id[m] for m in matches if m in title_to_id]
+        ground_truth[record["query"]] = matches
+    return ground_truth
+
+
+def load_results(path: Path | str = "all_results.pkl") -> list[list[dict]]:
+    """
+    Load sweep results: one list per model of {"query", "match", "model"} dicts.
+    `path` is either a ResultStore directory or a legacy all_results.pkl.
+    """
+    if Path(path).is_dir():
+        from winnow.embeddings.result_store import ResultStore
+
+        return ResultStore(path).to_results()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def build_hits(
+    all_results: list[list[dict]],
+    ground_truth: dict[str, list[str]],
+    k: Optional[int] = None,
+) -> tuple[list[str], list[str], np.ndarray, np.ndarray]:
+    """
+    Turn sweep results into arrays.
+
+    Returns:
+        models: model names (axis 0)
+        queries: queries that have ground truth (axis 1)
+        hits: bool (models, queries, k), True where the ranked id is relevant
+        n_relevant: int (queries,), number of relevant ids per query
+    """
+    queries = [query for query, matches in ground_truth.items() if matches]
+    query_index = {query: i for i, query in enumerate(queries)}
+    vocabulary: dict[str, int] = {}
+    relevant_pairs = [
+        (query_index[query], vocabulary.setdefault(str(match), len(vocabulary)))
+        for query in queries
+        for match in dict.fromkeys(ground_truth[query])
+    ]
+    if k is None:
+        k = max((len(r["match"]) for results in all_results for r in results), default=0)
+    models = []
+    retrieved = np.full((len(all_results), len(queries), k), -1, dtype=np.int64)
+    for m, results in enumerate(all_results):
+        models.append(results[0].get("model", str(m)) if results else str(m))
+        for result in results:
+            q = query_index.get(result["query"])
+            if q is None:
+                continue
+            ranked = [
+                vocabulary.setdefault(str(match), len(vocabulary))
+                for match in result["match"][:k]
+            ]
+            retrieved[m, q, : len(ranked)] = ranked
+    relevance = np.zeros((len(queries), len(vocabulary) + 1), dtype=bool)
+    if relevant_pairs:
+        rows, cols = np.array(relevant_pairs).T
+        relevance[rows, cols] = True
+    # Padding (-1) indexes the extra all-False column.
+    hits = relevance[np.arange(len(queries))[None, :, None], retrieved]
+    n_relevant = relevance.sum(axis=1)
+    return models, queries, hits, n_relevant
+
+
+def metric_scores(
+    hits: np.ndarray, n_relevant: np.ndarray, metric: str, k: Optional[int] = None
+) -> np.ndarray:
+    """
+    Per (model, query) score for one metric at cutoff k -> (models, queries).
+    """
+    k = hits.shape[-1] if k is None else min(k, hits.shape[-1])
+    top = hits[..., :k]
+    found = top.sum(axis=-1)
+    if metric == "recall":
+        return found / np.maximum(n_relevant, 1)
+    if metric == "precision":
+        return found / k if k else found.astype(float)
+    if metric == "mrr":
+        first = top.argmax(axis=-1)
+        return np.where(top.any(axis=-1), 1.0 / (first + 1), 0.0)
+    if metric == "ndcg":
+        discounts = 1.0 / np.log2(np.arange(k) + 2)
+        dcg = (top * discounts).sum(axis=-1)
+        ideal = np.concatenate([[0.0], np.cumsum(discounts)])
+        idcg = ideal[np.minimum(n_relevant, k)]
+        return np.where(idcg > 0, dcg / np.where(idcg > 0, idcg, 1), 0.0)
+    raise ValueError(f"Unknown metric: {metric}")
+
+
+def bootstrap_weights(
+    n_queries: int, n_resamples: int = 1000, seed: int = 0
+) -> np.ndarray:
+    """
+    (resamples, queries) counts of how often each query is drawn per resample.
+    Means over resampled query sets are then one matmul instead of gathering a
+    (models, resamples, queries) array.
+    """
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, n_queries, size=(n_resamples, n_queries))
+    offsets = np.arange(n_resamples)[:, None] * n_queries
+    counts = np.bincount((samples + offsets).ravel(), minlength=n_resamples * n_queries)
+    return counts.reshape(n_resamples, n_queries).astype(np.float64)
+
+
+def bootstrap_ci(
+    scores: np.ndarray, weights: np.ndarray, alpha: float = 0.05
+) -> np.ndarray:
+    """
+    Percentile CI of the mean over queries, for every model at once.
+    scores: (models, queries), weights: from bootstrap_weights.
+    Returns (models, 2) of [low, high]. Sharing weights across models and metrics
+    keeps intervals comparable.
+    """
+    means = scores @ weights.T / scores.shape[1]  # (models, resamples)
+    return np.quantile(means, [alpha / 2, 1 - alpha / 2], axis=1).T
+
+
+def evaluate(
+    all_results: list[list[dict]],
+    ground_truth: dict[str, list[str]],
+    ks: Sequence[int] = (1, 5, 10),
+    metrics: Sequence[str] = METRICS,
+    n_resamples: int = 0,
+    alpha: float = 0.05,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Score every model. Returns one dict per model with "<metric>@<k>" means (MRR
+    is reported at the largest k) and, if n_resamples > 0, "<metric>@<k>_ci"
+    (low, high) bootstrap intervals.
+    """
+    models, queries, hits, n_relevant = build_hits(all_results, ground_truth)
+    rows = [{"model": model, "queries": len(queries)} for model in models]
+    weights = (
+        bootstrap_weights(len(queries), n_resamples, seed)
+        if n_resamples and queries
+        else None
+    )
+    for metric in metrics:
+        cutoffs = [max(ks)] if metric == "mrr" else ks
+        for k in cutoffs:
+            scores = metric_scores(hits, n_relevant, metric, k)
+            name = "mrr" if metric == "mrr" else f"{metric}@{k}"
+            means = scores.mean(axis=1) if queries else np.zeros(len(models))
+            intervals = (
+                bootstrap_ci(scores, weights, alpha) if weights is not None else None
+            )
+            for i, row in enumerate(rows):
+                row[name] = float(means[i])
+                if intervals is not None:
+                    row[f"{name}_ci"] = tuple(float(x) for x in intervals[i])
+    return rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    ground_truth = load_ground_truth(sys.argv[1])
+    all_results = load_results(sys.argv[2] if len(sys.argv) > 2 else "all_results.pkl")
+    rows = evaluate(all_results, ground_truth, n_resamples=1000)
+    rows.sort(key=lambda row: row["ndcg@10"], reverse=True)
+    for row in rows:
+        print(
+            f"{row['model']:<45} recall@10 {row['recall@10']:.3f} "
+            f"[{row['recall@10_ci'][0]:.3f}, {row['recall@10_ci'][1]:.3f}]  "
+            f"mrr {row['mrr']:.3f}  ndcg@10 {row['ndcg@10']:.3f}"
+        )
@@ -0,0 +1,329 @@
+"""
+Async client for API rerankers (Jina, Cohere).
+
+`rerank_options` sends API rankers one document per request, one request at a
+time. This client instead:
+
+- keeps one pooled `httpx.AsyncClient` per provider (connections are reused),
+  shared by every call in the process through `shared_client`,
+- packs up to the provider's per-request document limit into each call,
+- runs requests concurrently, capped by a semaphore and a token-bucket rate
+  limit per provider,
+- retries 429s, 5xx and transport errors with jittered exponential backoff
+  (honouring Retry-After when the provider sends it).
+
+Both providers speak the same shape:
+
+```
+POST {"model", "query", "documents": [...], "top_n"}
+-> {"results": [{"index": i, "relevance_score": s}, ...]}
+```
+
+`base_url` can point anywhere that speaks it, e.g. a local stub server for
+offline throughput runs.
+
+Shared clients live on one background event loop thread, so their connection
+pool and token bucket carry over between blocking `rerank_queries_api` calls
+(an `asyncio.run` per call would bind them to a loop that is then closed), and
+those calls work from code that is already inside an event loop.
+
+`rankllm` is listwise LLM reranking over the OpenAI chat API rather than a rerank
+endpoint, so it stays on the rerankers library path.
+"""
+
+import asyncio
+import heapq
+import os
+import random
+import threading
+import httpx
+from time import monotonic
+from typing import NamedTuple, Optional
+from winnow.embeddings.embedding_cache import content_hash
+from winnow.rerankers.rerank import rankers
+from winnow.rerankers.score_cache import ScoreCache, ranker_key, score_cache
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class Provider(NamedTuple):
+    url: str
+    model: str
+    api_key_env: str
+    max_documents: int  # documents per request
+    requests_per_second: float
+    burst: int
+
+
+PROVIDERS = {
+    "jina": Provider(
+        url="https://api.jina.ai/v1/rerank",
+        model="jina-reranker-v2-base-multilingual",
+        api_key_env="JINA_API_KEY",
+        max_documents=1024,
+        requests_per_second=8,
+        burst=8,
+    ),
+    "cohere": Provider(
+        url="https://api.cohere.com/v2/rerank",
+        model="rerank-english-v3.0",
+        api_key_env="COHERE_API_KEY",
+        max_documents=1000,
+        requests_per_second=10,
+        burst=10,
+    ),
+}
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, up to `capacity` at once.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncRerankClient:
+    """
+    Concurrent, rate-limited rerank calls against one provider.
+
+    Args:
+        provider: key into PROVIDERS (or a Provider).
+        api_key: defaults to the provider's environment variable.
+        base_url: override the endpoint (stub servers, proxies).
+        concurrency: requests in flight at once.
+        max_retries: retries per request after the first attempt.
+        backoff: base delay in seconds; attempt n waits up to backoff * 2**n.
+
+    The HTTP pool opens on first use and stays open until aclose() (or the end
+    of an `async with` block). A client belongs to the event loop it first ran on.
+    """
+
+    def __init__(
+        self,
+        provider: str | Provider,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 60.0,
+    ):
+        self.provider = PROVIDERS[provider] if isinstance(provider, str) else provider
+        self.api_key = api_key or os.getenv(self.provider.api_key_env)
+        self.url = base_url or self.provider.url
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(self.provider.requests_per_second, self.provider.burst)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.retries = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncRerankClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _post(self, payload: dict) -> dict:
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await self.client.post(self.url, json=payload)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = response.headers.get("Retry-After")
+            self.retries += 1
+            # Full jitter, unless the provider told us how long to wait.
+            delay = random.uniform(0, self.backoff * 2**attempt)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def score(self, query: str, documents: list[str]) -> list[float]:
+        """
+        Relevance score for every document (input order), in as few requests as
+        the provider's per-request limit allows, sent concurrently.
+        """
+        step = self.provider.max_documents
+
+        async def score_chunk(start: int) -> list[tuple[int, float]]:
+            chunk = documents[start : start + step]
+            body = await self._post(
+                {
+                    "model": self.provider.model,
+                    "query": query,
+                    "documents": chunk,
+                    "top_n": len(chunk),
+                }
+            )
+            return [
+                (start + result["index"], result["relevance_score"])
+                for result in body["results"]
+            ]
+
+        scores = [float("-inf")] * len(documents)
+        chunks = await asyncio.gather(
+            *(score_chunk(start) for start in range(0, len(documents), step))
+        )
+        for chunk in chunks:
+            for i, score in chunk:
+                scores[i] = score
+        return scores
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_clients: dict[str, AsyncRerankClient] = {}
+_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """
+    The event loop (on a daemon thread) that shared clients run on.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="rerank-api", daemon=True
+            ).start()
+    return _loop
+
+
+def shared_client(model_name: str) -> AsyncRerankClient:
+    """
+    The process-wide client for a provider, created on first use.
+    """
+    with _lock:
+        if model_name not in _shared_clients:
+            _shared_clients[model_name] = AsyncRerankClient(model_name)
+        return _shared_clients[model_name]
+
+
+def set_shared_client(model_name: str, client: AsyncRerankClient) -> None:
+    """
+    Replace a provider's shared client (another base_url, concurrency, ...).
+    The old one is closed on the background loop.
+    """
+    with _lock:
+        old = _shared_clients.pop(model_name, None)
+        _shared_clients[model_name] = client
+    if old is not None:
+        asyncio.run_coroutine_threadsafe(old.aclose(), background_loop()).result()
+
+
+async def arerank_queries(
+    options_by_query: dict[str, list[tuple]],
+    k: int = 5,
+    model_name: str = "cohere",
+    cache: Optional[ScoreCache] = score_cache,
+    client: Optional[AsyncRerankClient] = None,
+) -> dict[str, list[tuple]]:
+    """
+    Async counterpart of rerank.rerank_queries for API rankers: every query is
+    scored concurrently through one pooled client. Cached pairs skip the API.
+    Without a client, the provider's shared client does the work on its own loop.
+    """
+    if client is None:
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(
+                arerank_queries(
+                    options_by_query, k, model_name, cache, shared_client(model_name)
+                ),
+                background_loop(),
+            )
+        )
+    key = ranker_key(rankers[model_name])
+
+    async def rerank_one(query: str, options: list[tuple]):
+        doc_hashes = [content_hash(option[1]) for option in options]
+        cached = cache.get_many(key, query, doc_hashes) if cache is not None else {}
+        todo = [i for i, doc_hash in enumerate(doc_hashes) if doc_hash not in cached]
+        fresh = await client.score(query, [options[i][1] for i in todo]) if todo else []
+        scores = {doc_hashes[i]: s for i, s in zip(todo, fresh)}
+        if cache is not None:
+            # Documents missing from a response keep -inf and aren't cached.
+            cache.put_many(
+                key, query, {h: s for h, s in scores.items() if s != float("-inf")}
+            )
+        scores |= cached
+        scored = [(option[0], scores[h]) for option, h in zip(options, doc_hashes)]
+        return query, heapq.nlargest(k, scored, key=lambda x: x[1])
+
+    ranked = await asyncio.gather(
+        *(rerank_one(q, o) for q, o in options_by_query.items())
+    )
+    return dict(ranked)
+
+
+def rerank_queries_api(
+    options_by_query: dict[str, list[tuple]],
+    k: int = 5,
+    model_name: str = "cohere",
+    cache: Optional[ScoreCache] = score_cache,
+) -> dict[str, list[tuple]]:
+    """
+    Blocking wrapper around arerank_queries (shared client) for scripts.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        arerank_queries(
+            options_by_query, k, model_name, cache, shared_client(model_name)
+        ),
+        background_loop(),
+    ).result()
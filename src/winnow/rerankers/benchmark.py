@@ -0,0 +1,203 @@
+"""
+Throughput / latency / quality benchmark over the `rankers` table.
+
+Every locally runnable ranker (anything without an API key) runs over the same
+workload of (query, candidates) pairs, each in a fresh process so load time and
+peak RSS belong to that ranker alone. Reported per ranker:
+
+- load_seconds: building the Reranker (weights from disk/hub)
+- docs_per_second: candidates scored / scoring time
+- p50_ms, p95_ms, p99_ms: per-query latency
+- peak_rss_mb: the worker's max RSS (resource.getrusage)
+- quality metrics (retrieval_metrics.evaluate) when ground truth is given
+
+Results go to a JSON file stamped with the git commit, so runs can be diffed
+across commits.
+
+A workload is JSON, one object per query:
+```json
+[{"query": ..., "candidates": [{"id": ..., "text": ...}, ...]}, ...]
+```
+Without one, `synthetic_workload` makes a fixed random one (same seed, same text).
+
+```
+python -m winnow.rerankers.benchmark [workload.json] [ground_truth.json] [out.json]
+```
+"""
+
+import json
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Sequence
+from winnow.rerankers.rerank import ranker_batch_size, rankers, score_options
+
+Workload = dict[str, list[tuple]]  # query -> [(id, text), ...]
+
+
+def local_rankers() -> list[str]:
+    """
+    Rankers that run on this machine (API-backed configs carry an api_key).
+    """
+    return [name for name, config in rankers.items() if "api_key" not in config]
+
+
+def synthetic_workload(
+    n_queries: int = 32,
+    n_candidates: int = 50,
+    doc_words: int = 200,
+    seed: int = 0,
+) -> Workload:
+    """
+    Deterministic random-word workload: same seed, same text, so runs compare.
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+        for _ in range(5000)
+    ]
+    workload = {}
+    for q in range(n_queries):
+        query = " ".join(rng.choices(vocabulary, k=rng.randint(2, 8)))
+        workload[query] = [
+            (f"q{q}_d{d}", " ".join(rng.choices(vocabulary, k=doc_words)))
+            for d in range(n_candidates)
+        ]
+    return workload
+
+
+def load_workload(path: Path | str) -> Workload:
+    records = json.loads(Path(path).read_text())
+    return {
+        record["query"]: [
+            (str(candidate["id"]), candidate["text"])
+            for candidate in record["candidates"]
+        ]
+        for record in records
+    }
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _run_one(model_name: str, workload: Workload, batch_size: Optional[int]) -> dict:
+    """
+    Worker: load one ranker, score the workload, report timings and results.
+    """
+    from rerankers import Reranker
+
+    start = perf_counter()
+    ranker = Reranker(**rankers[model_name], verbose=False)
+    load_seconds = perf_counter() - start
+    batch_size = ranker_batch_size(model_name, batch_size)
+    latencies = []
+    results = []
+    documents = 0
+    for query, options in workload.items():
+        start = perf_counter()
+        scored = score_options(ranker, options, query, batch_size)
+        latencies.append(perf_counter() - start)
+        documents += len(options)
+        scored.sort(key=lambda x: x[1], reverse=True)
+        results.append(
+            {"query": query, "match": [id for id, _ in scored], "model": model_name}
+        )
+    scoring_seconds = sum(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "model": model_name,
+        "status": "SUCCESS",
+        "load_seconds": load_seconds,
+        "queries": len(workload),
+        "documents": documents,
+        "docs_per_second": documents / scoring_seconds if scoring_seconds else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "peak_rss_mb": _peak_rss_bytes() / 1024**2,
+        "results": results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_rankers(
+    workload: Workload,
+    model_names: Optional[Sequence[str]] = None,
+    ground_truth: Optional[dict[str, list[str]]] = None,
+    batch_size: Optional[int] = 64,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    One row per ranker. A ranker that fails to load or score gets status "FAIL"
+    and the error as "output"; the rest still run.
+    """
+    from winnow.evaluation.retrieval_metrics import evaluate
+
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for model_name in model_names or local_rankers():
+        # Fresh process per ranker: load time is cold and peak RSS is its own.
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                row = pool.submit(_run_one, model_name, workload, batch_size).result()
+            except Exception as e:
+                row = {"model": model_name, "status": "FAIL", "output": repr(e)}
+        results = row.pop("results", None)
+        if results and ground_truth:
+            quality = evaluate([results], ground_truth, ks=(1, 5, 10))[0]
+            row.update({key: value for key, value in quality.items() if key not in ("model", "queries")})
+        if verbose:
+            if row["status"] == "SUCCESS":
+                print(
+                    f"{model_name:<10} load {row['load_seconds']:6.1f}s | "
+                    f"{row['docs_per_second']:8.1f} docs/s | p50 {row['p50_ms']:7.1f} "
+                    f"p95 {row['p95_ms']:7.1f} p99 {row['p99_ms']:7.1f} ms | "
+                    f"peak RSS {row['peak_rss_mb']:7.0f} MB"
+                )
+            else:
+                print(f"{model_name:<10} failed: {row['output']}")
+        rows.append(row)
+    return rows
+
+
+def write_report(rows: list[dict], path: Path | str, workload: Workload) -> None:
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "queries": len(workload),
+        "candidates": sum(len(options) for options in workload.values()),
+        "rankers": rows,
+    }
+    Path(path).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    from winnow.evaluation.retrieval_metrics import load_ground_truth
+
+    workload = load_workload(sys.argv[1]) if len(sys.argv) > 1 else synthetic_workload()
+    ground_truth = load_ground_truth(sys.argv[2]) if len(sys.argv) > 2 else None
+    out = sys.argv[3] if len(sys.argv) > 3 else "rerank_benchmark.json"
+    rows = benchmark_rankers(workload, ground_truth=ground_truth)
+    write_report(rows, out, workload)
+    print(f"Wrote {out}")
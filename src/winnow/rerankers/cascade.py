@@ -0,0 +1,142 @@
+"""
+Retrieve-then-rerank cascade.
+
+```
+dense retrieval (N) -> cheap reranker (M) -> expensive reranker (k)
+```
+
+Each stage only scores what the stage before it kept, so a cross-encoder like
+`bge` or `mxbai` sees the final few dozen candidates instead of every dense hit.
+Stages are (name, model_name from `rankers`, keep) triples, so budgets and the
+number of stages are configuration:
+
+```python
+cascade = Cascade(
+    backend, encode, documents,
+    retrieve=100,
+    stages=[Stage("cheap", "flash", 30), Stage("precise", "bge", 10)],
+)
+results = cascade.run(queries)
+print(cascade.report)
+```
+
+Results have the usual {"query", "match", "scores", "latency"} shape, plus
+"stage_latency" (seconds per stage for that query).
+"""
+
+import heapq
+import numpy as np
+from pydantic import BaseModel, Field
+from time import perf_counter
+from typing import Callable, Mapping, NamedTuple, Optional, Sequence
+from winnow.embeddings.backends import RetrievalBackend
+from winnow.rerankers.rerank import (
+    ranker_batch_size,
+    rankers,
+    reranker_registry,
+    score_options,
+)
+from winnow.rerankers.score_cache import ScoreCache, ranker_key, score_cache
+
+
+class Stage(NamedTuple):
+    name: str
+    model_name: str  # key into rerank.rankers
+    keep: int  # candidates passed to the next stage
+    batch_size: Optional[int] = 64
+
+
+class StageReport(BaseModel):
+    name: str
+    candidates: int = Field(default=0, description="Candidates scored")
+    seconds: float = Field(default=0.0, description="Time spent in the stage")
+
+
+class CascadeReport(BaseModel):
+    queries: int = 0
+    stages: list[StageReport] = Field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = [f"Cascade over {self.queries} queries:"]
+        for stage in self.stages:
+            per_query = stage.seconds / self.queries * 1000 if self.queries else 0.0
+            lines.append(
+                f"  {stage.name:<10} {stage.candidates:>7} candidates "
+                f"{stage.seconds:8.2f}s ({per_query:.1f} ms/query)"
+            )
+        return "\n".join(lines)
+
+
+class Cascade:
+    """
+    Dense retrieval followed by reranking stages with shrinking budgets.
+
+    Args:
+        backend: an indexed RetrievalBackend (Chroma or numpy).
+        encode: query encoder (the embedding function the index was built with).
+        documents: id -> text, what the rerankers score.
+        retrieve: dense candidates per query (N).
+        stages: rerank stages, cheapest first.
+        cache: reranker score cache (None to always rescore).
+    """
+
+    def __init__(
+        self,
+        backend: RetrievalBackend,
+        encode: Callable[[list[str]], Sequence],
+        documents: Mapping[str, str],
+        retrieve: int = 100,
+        stages: Sequence[Stage] = (Stage("cheap", "flash", 30), Stage("precise", "bge", 10)),
+        cache: Optional[ScoreCache] = score_cache,
+    ):
+        self.backend = backend
+        self.encode = encode
+        self.documents = documents
+        self.retrieve = retrieve
+        self.stages = list(stages)
+        self.cache = cache
+        self.report = CascadeReport()
+
+    def run(self, queries: Sequence[str]) -> list[dict]:
+        queries = list(queries)
+        dense = StageReport(name="dense")
+        reports = [StageReport(name=stage.name) for stage in self.stages]
+        start = perf_counter()
+        query_embeddings = np.asarray(self.encode(queries), dtype=np.float32)
+        ids, distances = self.backend.search(query_embeddings, k=self.retrieve)
+        dense.seconds = perf_counter() - start
+        dense_latency = dense.seconds / max(len(queries), 1)
+        results = []
+        for query, match, scores in zip(queries, ids, distances):
+            dense.candidates += len(match)
+            stage_latency = {"dense": dense_latency}
+            # Dense distances are lower-is-better; rerank scores are higher-is-better.
+            candidates = [(id, -float(score)) for id, score in zip(match, scores)]
+            for stage, report in zip(self.stages, reports):
+                start = perf_counter()
+                ranker = reranker_registry.get(stage.model_name)
+                options = [(id, self.documents[id]) for id, _ in candidates]
+                scored = score_options(
+                    ranker,
+                    options,
+                    query,
+                    ranker_batch_size(stage.model_name, stage.batch_size),
+                    self.cache,
+                    ranker_key(rankers[stage.model_name]),
+                )
+                candidates = heapq.nlargest(stage.keep, scored, key=lambda x: x[1])
+                elapsed = perf_counter() - start
+                report.candidates += len(options)
+                report.seconds += elapsed
+                stage_latency[stage.name] = elapsed
+            results.append(
+                {
+                    "query": query,
+                    "match": [id for id, _ in candidates],
+                    "scores": [score for _, score in candidates],
+                    "latency": sum(stage_latency.values()),
+                    "stage_latency": stage_latency,
+                }
+            )
+        self.report = CascadeReport(queries=len(queries), stages=[dense, *reports])
+        return results
@@ -0,0 +1,130 @@
+"""
+Process-wide registry of warm reranker instances.
+
+`Reranker(**rankers[name])` loads cross-encoder weights from disk (or the hub)
+every time it's constructed. The registry builds each entry once, on first use,
+and hands back the same instance afterwards.
+
+Loaded models are kept in least-recently-used order. Each load records how much
+memory it took (growth in this process's RSS, plus CUDA memory if torch is on a
+GPU), and when the total goes over `max_bytes` the least recently used models are
+dropped until it fits again. The model just requested is never evicted, so one
+oversized model still loads.
+"""
+
+import gc
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from winnow.utils import rss_bytes
+
+DEFAULT_MEMORY_GB = float(os.getenv("RERANKER_MEMORY_GB", "8"))
+
+
+def _memory_in_use() -> int:
+    """
+    RSS of this process plus allocated CUDA memory (if torch is already imported).
+    """
+    used = rss_bytes(os.getpid()) or 0
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        used += torch.cuda.memory_allocated()
+    return used
+
+
+class RerankerRegistry:
+    """
+    Lazily built, LRU-evicted reranker instances.
+
+    Args:
+        configs: name -> Reranker kwargs (e.g. rerank.rankers).
+        max_bytes: memory budget for loaded models; None means no limit.
+        factory: what builds an instance from a config (rerankers.Reranker).
+    """
+
+    def __init__(
+        self,
+        configs: dict[str, dict],
+        max_bytes: Optional[int] = int(DEFAULT_MEMORY_GB * 1024**3),
+        factory: Optional[Callable] = None,
+    ):
+        self.configs = configs
+        self.max_bytes = max_bytes
+        self.factory = factory
+        self._loaded: OrderedDict[str, object] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, name: str):
+        """
+        Warm instance for `name`, building it on first use.
+        """
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name]
+            if name not in self.configs:
+                raise KeyError(f"Unknown reranker: {name}")
+            # Sizes from earlier loads let us make room before loading again.
+            self._evict(keep=None, incoming=self._sizes.get(name, 0))
+            before = _memory_in_use()
+            ranker = self._build(self.configs[name])
+            self._sizes[name] = max(_memory_in_use() - before, 0)
+            self._loaded[name] = ranker
+            self.loads += 1
+            self._evict(keep=name)
+            return ranker
+
+    def _build(self, config: dict):
+        if self.factory is None:
+            from rerankers import Reranker
+
+            self.factory = Reranker
+        return self.factory(**config, verbose=False)
+
+    def _evict(self, keep: Optional[str], incoming: int = 0) -> None:
+        if self.max_bytes is None:
+            return
+        evicted = False
+        while self._loaded and self.memory_bytes + incoming > self.max_bytes:
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                break
+            del self._loaded[oldest]
+            evicted = True
+        if evicted:
+            self._release()
+
+    @staticmethod
+    def _release() -> None:
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def evict(self, name: str) -> None:
+        with self._lock:
+            if self._loaded.pop(name, None) is not None:
+                self._release()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded.clear()
+            self._release()
+
+    @property
+    def loaded(self) -> list[str]:
+        """
+        Loaded model names, least recently used first.
+        """
+        return list(self._loaded)
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+        Estimated memory held by loaded models.
+        """
+        return sum(self._sizes.get(name, 0) for name in self._loaded)
@@ -1,5 +1,9 @@
-from rerankers import Reranker
+import heapq
 import os
+from typing import Optional
+from winnow.embeddings.embedding_cache import content_hash
+from winnow.rerankers.registry import RerankerRegistry
+from winnow.rerankers.score_cache import ScoreCache, ranker_key, score_cache
 
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 JINA_API_KEY = os.getenv("JINA_API_KEY")
@@ -26,26 +30,145 @@ rankers = {
     "rankllm": {"model_name": "rankllm", "api_key": OPENAI_API_KEY},
 }
 
+# Listwise rankers order a whole candidate list in one call: ranks from separate
+# batches aren't comparable, so they always get every candidate at once.
+LISTWISE_RANKERS = {"rankllm"}
+
+# Warm instances shared by everything in this process (see registry.py).
+reranker_registry = RerankerRegistry(rankers)
+
+
+def ranked_scores(ranked, scored_only: bool = False) -> list[tuple[int, float]]:
+    """
+    (doc_id, score) pairs from a rank() result, whatever shape it came back in.
+    Different models return RankedResults or a single Result, and rank-only
+    models (e.g. rankllm) leave score empty, so their rank stands in (negated, so
+    higher is still better). scored_only drops those instead: a rank only means
+    something next to the documents it was ranked with, so it mustn't be cached.
+    """
+    results = getattr(ranked, "results", None)
+    if results is None:
+        results = [ranked]
+    return [
+        (
+            result.document.doc_id,
+            result.score if result.score is not None else -float(result.rank),
+        )
+        for result in results
+        if result.score is not None or not scored_only
+    ]
+
+
+def ranker_batch_size(model_name: str, batch_size: Optional[int]) -> Optional[int]:
+    """
+    batch_size for a ranker: None (everything in one call) for listwise rankers.
+    """
+    return None if model_name in LISTWISE_RANKERS else batch_size
+
+
+def score_options(
+    ranker,
+    options: list[tuple],
+    query: str,
+    batch_size: Optional[int] = 64,
+    cache: Optional[ScoreCache] = None,
+    cache_key: Optional[str] = None,
+) -> list[tuple]:
+    """
+    (course, score) for every option, scoring up to `batch_size` documents per
+    rank() call (None sends them all at once, which listwise rankers need to
+    produce comparable ranks).
+    With a cache (and the ranker's cache_key), only options without a stored
+    score for this query are sent to the model, and new scores are written back.
+    """
+    if not options:
+        return []
+    doc_hashes = [content_hash(option[1]) for option in options]
+    cached = (
+        cache.get_many(cache_key, query, doc_hashes)
+        if cache is not None and cache_key
+        else {}
+    )
+    todo = [i for i, doc_hash in enumerate(doc_hashes) if doc_hash not in cached]
+    scores = {
+        i: cached[doc_hash] for i, doc_hash in enumerate(doc_hashes) if doc_hash in cached
+    }
+    step = batch_size or len(todo) or 1
+    for start in range(0, len(todo), step):
+        batch = todo[start : start + step]
+        ranked = ranker.rank(
+            query=query,
+            docs=[options[i][1] for i in batch],  # "document" from the Chroma output.
+            doc_ids=batch,
+        )
+        scores.update(ranked_scores(ranked))
+        if cache is not None and cache_key:
+            cache.put_many(
+                cache_key,
+                query,
+                {
+                    doc_hashes[i]: score
+                    for i, score in ranked_scores(ranked, scored_only=True)
+                },
+            )
+    return [(options[i][0], scores[i]) for i in range(len(options)) if i in scores]
+
 
 def rerank_options(
-    options: list[tuple], query: str, k: int = 5, model_name: str = "bge"
+    options: list[tuple],
+    query: str,
+    k: int = 5,
+    model_name: str = "bge",
+    batch_size: Optional[int] = 64,
+    cache: Optional[ScoreCache] = score_cache,
 ) -> list[tuple]:
     """
-    Reranking magic.
-    """
-    ranker = Reranker(**rankers[model_name], verbose=False)
-    ranked_results: list[tuple] = []
-    for option in options:
-        course = option[0]  # This is "id" from the Chroma output.
-        TOC = option[1]  # This is "document" from the Chroma output.
-        ranked = ranker.rank(query=query, docs=[TOC])
-        # Different models return different objects (RankedResults or Result)
-        try:  # See if it's a RankedResults object
-            score = ranked.results[0].score
-        except:  # If not, it's a Result object
-            score = ranked.score
-        ranked_results.append((course, score))
-    # sort ranked_results by highest score
-    ranked_results.sort(key=lambda x: x[1], reverse=True)
-    # Return the five best.
-    return ranked_results[:k]
+    Rerank (id, document) options from Chroma for one query and return the k best
+    (id, score) pairs, highest score first. Pass cache=None to always rescore.
+    API rankers (jina, cohere) go through the pooled async client.
+    """
+    from winnow.rerankers.api_client import PROVIDERS, rerank_queries_api
+
+    if model_name in PROVIDERS:
+        return rerank_queries_api({query: options}, k, model_name, cache=cache)[query]
+    ranker = reranker_registry.get(model_name)
+    scored = score_options(
+        ranker,
+        options,
+        query,
+        ranker_batch_size(model_name, batch_size),
+        cache,
+        ranker_key(rankers[model_name]),
+    )
+    return heapq.nlargest(k, scored, key=lambda x: x[1])
+
+
+def rerank_queries(
+    options_by_query: dict[str, list[tuple]],
+    k: int = 5,
+    model_name: str = "bge",
+    batch_size: Optional[int] = 64,
+    cache: Optional[ScoreCache] = score_cache,
+) -> dict[str, list[tuple]]:
+    """
+    rerank_options for a whole query set: {query: options} -> {query: top k}.
+    The ranker is fetched once and each query's candidates go through in
+    batches of `batch_size`: at least one rank() call per query (rank() takes a
+    single query, so batches don't span queries), rather than one per
+    (query, candidate). API rankers run all queries concurrently instead.
+    """
+    from winnow.rerankers.api_client import PROVIDERS, rerank_queries_api
+
+    if model_name in PROVIDERS:
+        return rerank_queries_api(options_by_query, k, model_name, cache=cache)
+    ranker = reranker_registry.get(model_name)
+    key = ranker_key(rankers[model_name])
+    batch_size = ranker_batch_size(model_name, batch_size)
+    return {
+        query: heapq.nlargest(
+            k,
+            score_options(ranker, options, query, batch_size, cache, key),
+            key=lambda x: x[1],
+        )
+        for query, options in options_by_query.items()
+    }
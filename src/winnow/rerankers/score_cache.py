@@ -0,0 +1,118 @@
+"""
+Persistent cache of reranker scores.
+
+Tuning retrieval re-reranks the same (query, course TOC) pairs run after run.
+Scores are stored in SQLite keyed by
+
+    (ranker config hash, query hash, document hash)
+
+so a pair is only sent to a model the first time that exact ranker sees it.
+Lookups and write-back are batched: one SELECT per few hundred candidates and
+one transaction per rank() batch.
+
+The ranker hash covers the `rankers` entry minus credentials, so rotating an API
+key keeps the cache, while changing model_name or model_type starts a new one.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+from winnow.embeddings.embedding_cache import content_hash
+
+dir_path = Path(__file__).parent
+DEFAULT_CACHE_PATH = dir_path / ".rerank_cache" / "scores.sqlite"
+# Stay well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+
+def ranker_key(config: dict) -> str:
+    """
+    Hash of a reranker config (e.g. rankers["bge"]), ignoring API keys.
+    """
+    public = {key: value for key, value in config.items() if key != "api_key"}
+    return content_hash(json.dumps(public, sort_keys=True, default=str))
+
+
+class ScoreCache:
+    """
+    SQLite table of (ranker, query, doc) -> score.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module doesn't touch the disk.
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scores (
+                    ranker TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    doc TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    PRIMARY KEY (ranker, query, doc)
+                ) WITHOUT ROWID
+                """
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def get_many(
+        self, ranker: str, query: str, doc_hashes: Iterable[str]
+    ) -> dict[str, float]:
+        """
+        Cached scores for the given document hashes ({doc_hash: score}).
+        """
+        doc_hashes = list(dict.fromkeys(doc_hashes))
+        query_hash = content_hash(query)
+        found: dict[str, float] = {}
+        with self._lock:
+            for i in range(0, len(doc_hashes), LOOKUP_CHUNK):
+                chunk = doc_hashes[i : i + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT doc, score FROM scores WHERE ranker = ? AND query = ? "
+                    f"AND doc IN ({','.join('?' * len(chunk))})",
+                    (ranker, query_hash, *chunk),
+                )
+                found.update(rows)
+        self.hits += len(found)
+        self.misses += len(doc_hashes) - len(found)
+        return found
+
+    def put_many(self, ranker: str, query: str, scores: dict[str, float]) -> None:
+        """
+        Store {doc_hash: score} for one query in a single transaction.
+        """
+        if not scores:
+            return
+        query_hash = content_hash(query)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                [(ranker, query_hash, doc, score) for doc, score in scores.items()],
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+score_cache = ScoreCache()
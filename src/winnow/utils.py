@@ -0,0 +1,26 @@
+"""
+Small helpers shared across the embeddings, rerankers and evaluation packages.
+"""
+
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token) for when no tokenizer is at hand.
+    """
+    return len(text) // 4 + 1
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """
+    Resident set size of a process, or None if it can't be read.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
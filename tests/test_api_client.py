@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from winnow.rerankers import api_client
+from winnow.rerankers.api_client import (
+    AsyncRerankClient,
+    Provider,
+    arerank_queries,
+    rerank_queries_api,
+    set_shared_client,
+)
+
+
+class StubRerank(BaseHTTPRequestHandler):
+    """
+    Scores a document by its length. Answers the first `throttle` requests
+    with 429 and a Retry-After.
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append((time.monotonic(), len(body["documents"])))
+            throttled = server.throttle > 0
+            server.throttle -= throttled
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        results = [
+            {"index": i, "relevance_score": float(len(document))}
+            for i, document in enumerate(body["documents"])
+        ]
+        payload = json.dumps({"results": results}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRerank)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.throttle = 0
+    server.retry_after = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(stub, max_documents=4, requests_per_second=1000.0, burst=1000):
+    provider = Provider(
+        url=f"http://127.0.0.1:{stub.server_port}/rerank",
+        model="stub",
+        api_key_env="STUB_API_KEY",
+        max_documents=max_documents,
+        requests_per_second=requests_per_second,
+        burst=burst,
+    )
+    return AsyncRerankClient(provider, backoff=0.01)
+
+
+def options(n):
+    return [(f"id{i}", "x" * (i + 1)) for i in range(n)]
+
+
+def test_batches_by_provider_limit(stub):
+    client = make_client(stub, max_documents=4)
+    ranked = asyncio.run(
+        arerank_queries({"q": options(10)}, k=3, cache=None, client=client)
+    )
+    assert ranked["q"] == [("id9", 10.0), ("id8", 9.0), ("id7", 8.0)]
+    assert sorted(size for _, size in stub.requests) == [2, 4, 4]
+
+
+def test_retries_429_after_retry_after(stub):
+    stub.throttle = 2
+    stub.retry_after = 0.2
+    client = make_client(stub)
+    start = time.monotonic()
+    ranked = asyncio.run(
+        arerank_queries({"q": options(3)}, k=1, cache=None, client=client)
+    )
+    assert ranked["q"] == [("id2", 3.0)]
+    assert client.retries == 2
+    assert len(stub.requests) == 3
+    assert time.monotonic() - start >= 0.4
+
+
+def test_token_bucket_limits_request_rate(stub):
+    client = make_client(stub, max_documents=1, requests_per_second=20, burst=1)
+    start = time.monotonic()
+    asyncio.run(arerank_queries({"q": options(6)}, cache=None, client=client))
+    # One token up front, then one every 1/20 s.
+    assert time.monotonic() - start >= 5 / 20
+    assert len(stub.requests) == 6
+
+
+def test_blocking_calls_share_one_client(stub, monkeypatch):
+    monkeypatch.setattr(api_client, "_shared_clients", {})
+    client = make_client(stub)
+    set_shared_client("cohere", client)
+    rerank_queries_api({"q": options(3)}, cache=None)
+
+    async def inside_a_running_loop():
+        return rerank_queries_api({"q": options(3)}, cache=None)
+
+    asyncio.run(inside_a_running_loop())
+    assert api_client.shared_client("cohere") is client
+    assert client.requests == 2
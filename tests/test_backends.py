@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from winnow.embeddings.backends import NumpyBackend
+
+IDS = ["a", "b", "c", "d"]
+EMBEDDINGS = np.array(
+    [[1.0, 0.0], [0.0, 2.0], [3.0, 3.0], [-1.0, 0.0]], dtype=np.float32
+)
+
+
+def brute_force(space, query):
+    if space == "l2":
+        distances = ((EMBEDDINGS - query) ** 2).sum(axis=1)
+    elif space == "ip":
+        distances = 1 - EMBEDDINGS @ query
+    else:
+        normed = EMBEDDINGS / np.linalg.norm(EMBEDDINGS, axis=1, keepdims=True)
+        distances = 1 - normed @ (query / np.linalg.norm(query))
+    order = np.argsort(distances, kind="stable")
+    return [IDS[i] for i in order], distances[order]
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+def test_search_matches_brute_force(space):
+    backend = NumpyBackend(space=space)
+    backend.index(IDS, EMBEDDINGS)
+    queries = np.array([[1.0, 0.5], [-2.0, 1.0]], dtype=np.float32)
+    ids, distances = backend.search(queries, k=3)
+    for query, got_ids, got_distances in zip(queries, ids, distances):
+        expected_ids, expected_distances = brute_force(space, query)
+        assert got_ids == expected_ids[:3]
+        assert got_distances == pytest.approx(expected_distances[:3].tolist(), abs=1e-5)
+
+
+def test_search_l2_is_squared_euclidean():
+    backend = NumpyBackend()
+    backend.index(IDS, EMBEDDINGS)
+    ids, distances = backend.search([[0.0, 0.0]], k=1)
+    assert ids == [["a"]]
+    assert distances == [[pytest.approx(1.0)]]
+
+
+def test_search_k_larger_than_index():
+    backend = NumpyBackend()
+    backend.index(IDS[:2], EMBEDDINGS[:2])
+    ids, _ = backend.search([[1.0, 0.0]], k=10)
+    assert ids == [["a", "b"]]
+    assert len(backend) == 2
+
+
+def test_search_empty_index():
+    backend = NumpyBackend()
+    backend.index([], np.empty((0, 2), dtype=np.float32))
+    assert backend.search([[1.0, 0.0]], k=5) == ([[]], [[]])
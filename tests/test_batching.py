@@ -0,0 +1,56 @@
+import numpy as np
+from winnow.embeddings.batching import (
+    encode_in_batches,
+    padding_efficiency,
+    plan_batches,
+)
+
+
+def test_plan_batches_padded_cost_stays_under_budget():
+    lengths = [10, 500, 20, 30, 480, 15, 5]
+    batches = plan_batches(lengths, budget=1000)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 1000
+    # Longest first: the two long items share the first batch.
+    assert batches[0] == [1, 4]
+
+
+def test_plan_batches_oversized_item_gets_its_own_batch():
+    assert plan_batches([5, 2000, 5], budget=100) == [[1], [0, 2]]
+
+
+def test_plan_batches_max_batch_size():
+    batches = plan_batches([1] * 10, budget=1000, max_batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_plan_batches_unpadded_keeps_order_and_sums():
+    lengths = [40, 40, 40, 90, 10]
+    assert plan_batches(lengths, budget=100, padded=False) == [[0, 1], [2], [3, 4]]
+
+
+def test_padding_efficiency():
+    assert padding_efficiency([4, 4], [[0, 1]]) == 1.0
+    assert padding_efficiency([1, 3], [[0, 1]]) == 4 / 6
+
+
+def test_encode_in_batches_restores_input_order():
+    texts = ["a" * n for n in (3, 50, 1, 20, 7, 50, 2)]
+    calls = []
+
+    def encode(batch):
+        calls.append(batch)
+        return [[len(text), 1.0] for text in batch]
+
+    embeddings = encode_in_batches(
+        texts, encode, lengths=[len(t) for t in texts], budget=60
+    )
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == [len(t) for t in texts]
+    # Batches were length-sorted, not in input order.
+    assert calls[0] == ["a" * 50]
+
+
+def test_encode_in_batches_empty():
+    assert encode_in_batches([], lambda batch: [], [], budget=10).shape == (0, 0)
@@ -0,0 +1,45 @@
+import json
+from winnow.rerankers.benchmark import (
+    benchmark_rankers,
+    load_workload,
+    local_rankers,
+    synthetic_workload,
+    write_report,
+)
+from winnow.rerankers.rerank import rankers
+
+
+def test_synthetic_workload_is_deterministic():
+    workload = synthetic_workload(n_queries=3, n_candidates=4, doc_words=5, seed=1)
+    assert workload == synthetic_workload(3, 4, 5, seed=1)
+    assert workload != synthetic_workload(3, 4, 5, seed=2)
+    assert len(workload) == 3
+    for candidates in workload.values():
+        assert len(candidates) == 4
+        assert all(len(text.split()) == 5 for _, text in candidates)
+
+
+def test_load_workload(tmp_path):
+    path = tmp_path / "workload.json"
+    path.write_text(
+        json.dumps([{"query": "q", "candidates": [{"id": 7, "text": "seven"}]}])
+    )
+    assert load_workload(path) == {"q": [("7", "seven")]}
+
+
+def test_local_rankers_exclude_api_rankers():
+    local = local_rankers()
+    assert "bge" in local
+    assert not any("api_key" in rankers[name] for name in local)
+
+
+def test_failed_ranker_is_reported_not_raised(tmp_path):
+    rows = benchmark_rankers(
+        {"q": [("1", "text")]}, model_names=["not-a-ranker"], verbose=False
+    )
+    assert rows[0]["model"] == "not-a-ranker"
+    assert rows[0]["status"] == "FAIL"
+    write_report(rows, tmp_path / "report.json", {"q": [("1", "text")]})
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["rankers"] == rows
+    assert (report["queries"], report["candidates"]) == (1, 1)
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from winnow.embeddings.backends import NumpyBackend
+from winnow.rerankers import cascade
+from winnow.rerankers.cascade import Cascade, Stage
+
+
+class StubRanker:
+    """
+    Scores each document (a number as text) with `score`; records what it saw.
+    """
+
+    def __init__(self, score):
+        self.score = score
+        self.seen = []
+
+    def rank(self, query, docs, doc_ids):
+        self.seen.append([int(doc) for doc in docs])
+        results = [
+            SimpleNamespace(
+                document=SimpleNamespace(doc_id=id), score=self.score(int(doc)), rank=None
+            )
+            for id, doc in zip(doc_ids, docs)
+        ]
+        return SimpleNamespace(results=results)
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    ids = [f"d{i}" for i in range(20)]
+    documents = {id: str(i) for i, id in enumerate(ids)}
+    backend = NumpyBackend()
+    backend.index(ids, np.arange(20, dtype=np.float32)[:, None])
+    # Cheap stage prefers high numbers, the expensive stage prefers odd ones.
+    cheap = StubRanker(lambda n: n)
+    precise = StubRanker(lambda n: n % 2 * 100 + n)
+    stubs = {"flash": cheap, "bge": precise}
+    monkeypatch.setattr(cascade.reranker_registry, "get", stubs.__getitem__)
+    encode = lambda queries: np.zeros((len(queries), 1), dtype=np.float32)
+    return backend, encode, documents, cheap, precise
+
+
+def test_each_stage_only_sees_what_the_last_one_kept(setup):
+    backend, encode, documents, cheap, precise = setup
+    runner = Cascade(
+        backend,
+        encode,
+        documents,
+        retrieve=12,
+        stages=[Stage("cheap", "flash", 5), Stage("precise", "bge", 2)],
+        cache=None,
+    )
+    (result,) = runner.run(["q"])
+    # Dense retrieval (closest to 0) keeps d0..d11; the cheap stage keeps 7..11.
+    assert sorted(cheap.seen[0]) == list(range(12))
+    assert sorted(precise.seen[0]) == [7, 8, 9, 10, 11]
+    assert result["match"] == ["d11", "d9"]
+    assert set(result["stage_latency"]) == {"dense", "cheap", "precise"}
+    assert result["latency"] == pytest.approx(sum(result["stage_latency"].values()))
+
+
+def test_report_counts_candidates_per_stage(setup):
+    backend, encode, documents, *_ = setup
+    runner = Cascade(
+        backend,
+        encode,
+        documents,
+        retrieve=10,
+        stages=[Stage("cheap", "flash", 4), Stage("precise", "bge", 1)],
+        cache=None,
+    )
+    results = runner.run(["q1", "q2", "q3"])
+    assert [len(r["match"]) for r in results] == [1, 1, 1]
+    report = runner.report
+    assert report.queries == 3
+    assert [(s.name, s.candidates) for s in report.stages] == [
+        ("dense", 30),
+        ("cheap", 30),
+        ("precise", 12),
+    ]
+    assert all(stage.seconds >= 0 for stage in report.stages)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from winnow.embeddings.backends import NumpyBackend
+from winnow.embeddings.chunking import (
+    ChunkedBackend,
+    aggregate_hits,
+    iter_chunks,
+    whitespace_spans,
+)
+
+
+def test_iter_chunks_overlapping_windows():
+    document = " ".join(f"t{i}" for i in range(10))
+    chunks = list(iter_chunks([("c1", document)], max_tokens=4, overlap=1))
+    assert [chunk.id for chunk in chunks] == ["c1::0", "c1::1", "c1::2"]
+    assert [chunk.text for chunk in chunks] == [
+        "t0 t1 t2 t3",
+        "t3 t4 t5 t6",
+        "t6 t7 t8 t9",
+    ]
+    assert {chunk.parent_id for chunk in chunks} == {"c1"}
+
+
+def test_iter_chunks_short_and_empty_documents():
+    records = [("a", "one two"), ("b", "   "), ("c", "x")]
+    chunks = list(iter_chunks(records, max_tokens=4, overlap=1))
+    assert [(chunk.id, chunk.text) for chunk in chunks] == [
+        ("a::0", "one two"),
+        ("c::0", "x"),
+    ]
+
+
+def test_iter_chunks_keeps_original_text_between_tokens():
+    document = "first  line\nsecond\tline"
+    (chunk,) = iter_chunks([("a", document)], whitespace_spans, max_tokens=8, overlap=2)
+    assert chunk.text == document
+
+
+def test_iter_chunks_rejects_bad_overlap():
+    with pytest.raises(ValueError):
+        list(iter_chunks([("a", "x")], max_tokens=4, overlap=4))
+
+
+def test_aggregate_hits_max_keeps_best_chunk():
+    ids, distances = aggregate_hits(
+        ["a::0", "b::1", "a::2", "c::0"], [0.1, 0.2, 0.3, 0.4], k=2
+    )
+    assert ids == ["a", "b"]
+    assert distances == [0.1, 0.2]
+
+
+def test_aggregate_hits_sum_rewards_many_matching_chunks():
+    ids, scores = aggregate_hits(
+        ["a::0", "b::0", "b::1", "b::2"], [0.1, 0.4, 0.4, 0.4], how="sum"
+    )
+    assert ids == ["b", "a"]
+    assert scores == pytest.approx([-1.8, -0.9])
+
+
+def test_aggregate_hits_unknown():
+    with pytest.raises(ValueError):
+        aggregate_hits(["a::0"], [0.1], how="mean")
+
+
+def test_chunked_backend_returns_parents():
+    backend = ChunkedBackend(NumpyBackend(space="cosine"), oversample=3)
+    backend.index(
+        ["a::0", "a::1", "b::0"],
+        np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], dtype=np.float32),
+    )
+    ids, distances = backend.search(np.array([[1.0, 0.0]]), k=2)
+    assert ids == [["a", "b"]]
+    assert distances[0][0] == pytest.approx(0.0, abs=1e-6)
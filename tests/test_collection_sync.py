@@ -0,0 +1,45 @@
+import chromadb
+import numpy as np
+import pytest
+from winnow.embeddings.collection_sync import HASH_KEY, sync_collection
+from winnow.embeddings.embedding_cache import EmbeddingCache, content_hash
+
+
+@pytest.fixture
+def collection(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    return client.create_collection("sync_test", embedding_function=None)
+
+
+def test_sync_only_touches_what_changed(collection, tmp_path):
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts], np.float32)
+
+    cache = EmbeddingCache(tmp_path / "cache")
+
+    def sync(records):
+        return sync_collection(
+            collection, records, "fake", encode, cache=cache, verbose=False
+        )
+
+    report = sync([("a", "alpha"), ("b", "beta"), ("c", "gamma")])
+    assert sorted(report.added) == ["a", "b", "c"] and collection.count() == 3
+
+    encoded.clear()
+    report = sync([("a", "alpha"), ("b", "beta, edited"), ("d", "delta")])
+    assert report.added == ["d"]
+    assert report.changed == ["b"]
+    assert report.removed == ["c"]
+    assert report.unchanged == 1
+    assert sorted(encoded) == ["beta, edited", "delta"]
+    stored = collection.get(ids=["b"], include=["metadatas", "documents"])
+    assert stored["documents"] == ["beta, edited"]
+    assert stored["metadatas"][0][HASH_KEY] == content_hash("beta, edited")
+    assert sorted(collection.get()["ids"]) == ["a", "b", "d"]
+
+    report = sync([("a", "alpha"), ("b", "beta, edited"), ("d", "delta")])
+    assert (report.added, report.changed, report.removed) == ([], [], [])
+    assert report.unchanged == 3
@@ -0,0 +1,97 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("kramer")
+pytest.importorskip("conduit")
+
+from winnow.evaluation.curation_rubric import curation_rubric  # noqa: E402
+from winnow.evaluation.curation_rubric.curation_rubric import (  # noqa: E402
+    CURATION_MARKER,
+    CurationRubric,
+    combined_template,
+    evaluate_curations,
+    score_combined,
+    template_strings,
+)
+
+
+def curation(title):
+    return SimpleNamespace(title=title, duration=60, TOCs=["Intro"])
+
+
+class SlowScorer:
+    """
+    Stand-in for score_dimension that tracks how many calls overlap.
+    """
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __call__(self, template, curation, model, verbose, cache):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if curation.title == "broken":
+                raise RuntimeError("bad response")
+            score = len(curation.title) % 5 + 1
+            return CurationRubric(dimension="d", score=score, rationale="r")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_concurrency_is_bounded_and_order_kept():
+    scorer = SlowScorer()
+    titles = ["a", "bb", "broken", "dddd", "eeeee", "f"]
+    start = time.perf_counter()
+    evaluations = evaluate_curations(
+        [curation(t) for t in titles], concurrency=4, cache=None, scorer=scorer
+    )
+    elapsed = time.perf_counter() - start
+    jobs = len(titles) * len(template_strings)
+    assert scorer.peak <= 4
+    assert elapsed < jobs * scorer.delay / 2  # ran in parallel
+    assert [e.title for e in evaluations] == titles
+    for evaluation in evaluations:
+        if evaluation.title == "broken":
+            assert "bad response" in evaluation.error
+            assert evaluation.final_score is None
+        else:
+            assert len(evaluation.rubrics) == len(template_strings)
+            assert evaluation.final_score == len(evaluation.title) % 5 + 1
+
+
+def test_combined_template_folds_every_dimension():
+    combined = combined_template()
+    assert combined is not None
+    for number in range(1, len(template_strings) + 1):
+        assert f"## Dimension {number} of {len(template_strings)}" in combined
+    assert combined.count(CURATION_MARKER) == 1
+    assert combined_template(["no curation block here"]) is None
+
+
+def test_combined_falls_back_per_dimension(monkeypatch):
+    def failing_conduit(**kwargs):
+        raise RuntimeError("combined request rejected")
+
+    calls = []
+
+    def scorer(template, curation, model, verbose, cache):
+        calls.append(template)
+        return CurationRubric(dimension="d", score=3, rationale="r")
+
+    monkeypatch.setattr(curation_rubric, "Conduit", failing_conduit)
+    monkeypatch.setattr(curation_rubric, "score_dimension", scorer)
+    rubrics, report = score_combined(curation("a"), "gpt-4o", cache=None)
+    assert report.mode == "fallback"
+    assert calls == template_strings
+    assert [r.score for r in rubrics] == [3] * len(template_strings)
+    # One failed combined request plus one per dimension.
+    assert report.requests == len(template_strings) + 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from winnow.embeddings.embedding_cache import EmbeddingCache, content_hash
+
+
+def fake_encode(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], np.float32)
+
+    return encode
+
+
+def test_embed_encodes_each_document_once(tmp_path):
+    cache = EmbeddingCache(tmp_path, shard_size=2)
+    calls = []
+    documents = ["alpha", "beta", "gamma", "alpha", "delta"]
+    first = cache.embed("model", documents, fake_encode(calls), verbose=False)
+    assert [len(batch) for batch in calls] == [2, 2]  # 4 unique, 2 per shard
+    assert first.tolist() == [[len(d), ord(d[0])] for d in documents]
+    calls.clear()
+    second = cache.embed("model", documents[::-1], fake_encode(calls), verbose=False)
+    assert calls == []
+    assert second.tolist() == first[::-1].tolist()
+
+
+def test_cache_persists_across_instances(tmp_path):
+    EmbeddingCache(tmp_path).embed("m", ["x", "yy"], fake_encode([]), verbose=False)
+    reopened = EmbeddingCache(tmp_path)
+    hashes = [content_hash("yy"), content_hash("x")]
+    assert reopened.contains("m", hashes + ["nope"]) == [True, True, False]
+    assert reopened.get("m", hashes).tolist() == [[2, ord("y")], [1, ord("x")]]
+
+
+def test_get_across_shards_and_prompts(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    vectors = np.arange(12, dtype=np.float32).reshape(6, 2)
+    hashes = [f"h{i}" for i in range(6)]
+    cache.append("m", hashes[:3], vectors[:3])
+    cache.append("m", hashes[3:], vectors[3:])
+    cache.append("m", ["h0"], -vectors[:1], prompt_name="query")
+    picked = ["h4", "h0", "h5", "h1", "h4"]
+    assert cache.get("m", picked).tolist() == vectors[[4, 0, 5, 1, 4]].tolist()
+    assert cache.get("m", hashes[3:]).tolist() == vectors[3:].tolist()
+    assert cache.get("m", ["h0"], prompt_name="query").tolist() == [[-0.0, -1.0]]
+    assert cache.get("m", []).shape == (0, 2)
+    with pytest.raises(KeyError):
+        cache.get("m", ["missing"])
+
+
+def test_append_rejects_mismatched_vectors(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    with pytest.raises(ValueError):
+        cache.append("m", ["a", "b"], np.zeros((1, 2)))
+    cache.append("m", ["a"], np.zeros((1, 2)))
+    with pytest.raises(ValueError):
+        cache.append("m", ["b"], np.zeros((1, 3)))
@@ -0,0 +1,33 @@
+import numpy as np
+from winnow.embeddings.encoders import Encoder
+
+
+class FakeModel:
+    max_seq_length = 64
+
+    @property
+    def tokenizer(self):
+        raise AssertionError("token_budget batching shouldn't tokenize")
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size, convert_to_numpy, normalize_embeddings):
+        self.batches.append(list(texts))
+        return np.array([[len(text), 0.0] for text in texts], np.float32)
+
+
+def test_token_budget_batches_without_a_tokenizer_pass():
+    encoder = Encoder.__new__(Encoder)
+    encoder.__dict__.update(
+        _model=FakeModel(),
+        token_budget=100,
+        batch_size=32,
+        normalize_embeddings=False,
+        dimensions=None,
+    )
+    texts = ["x" * n for n in (400, 8, 12, 300, 4)]
+    embeddings = encoder(texts)
+    assert [float(e[0]) for e in embeddings] == [400, 8, 12, 300, 4]
+    # Lengths cap at max_seq_length (64): long texts alone, short ones together.
+    assert [len(batch) for batch in encoder._model.batches] == [1, 1, 3]
@@ -0,0 +1,38 @@
+import numpy as np
+from winnow.embeddings.hnsw_sweep import hnsw_sweep, pareto_frontier
+
+
+def test_sweep_reuses_builds_and_recall_rises_with_search_ef(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(2000, 32)).astype(np.float32)
+    queries = embeddings[:30] + rng.normal(size=(30, 32)).astype(np.float32) * 0.3
+    ids = [str(i) for i in range(len(embeddings))]
+    rows = hnsw_sweep(
+        ids,
+        embeddings,
+        queries,
+        grid={"M": (4, 16), "construction_ef": (16,), "search_ef": (10, 200)},
+        root=tmp_path,
+        verbose=False,
+    )
+    points = [(r["M"], r["search_ef"]) for r in rows]
+    assert points == [(4, 10), (4, 200), (16, 10), (16, 200)]
+    by_point = {(r["M"], r["search_ef"]): r for r in rows}
+    for M in (4, 16):
+        low, high = by_point[M, 10], by_point[M, 200]
+        # One build per (M, construction_ef), shared by its search_ef rows.
+        assert low["build_seconds"] == high["build_seconds"]
+        assert low["index_bytes"] == high["index_bytes"] > 0
+        assert high["recall"] > low["recall"]
+    assert by_point[16, 10]["index_bytes"] > by_point[4, 10]["index_bytes"]
+    assert list(tmp_path.iterdir()) == []  # temporary clients cleaned up
+
+
+def test_pareto_frontier():
+    rows = [
+        {"recall": 0.9, "p95_ms": 2.0},
+        {"recall": 0.8, "p95_ms": 1.0},
+        {"recall": 0.7, "p95_ms": 1.5},  # dominated
+        {"recall": 0.95, "p95_ms": 3.0},
+    ]
+    assert [r["recall"] for r in pareto_frontier(rows)] == [0.8, 0.9, 0.95]
@@ -0,0 +1,53 @@
+import random
+import numpy as np
+import pytest
+from winnow.embeddings.batching import token_lengths
+from winnow.embeddings.chunking import iter_chunks, parent_id, tokenizer_spans
+from winnow.embeddings.ingest import run_ingest
+
+
+@pytest.fixture
+def fast_tokenizer():
+    transformers = pytest.importorskip("transformers")
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    words = [f"w{i}" for i in range(500)]
+    vocab = {word: i for i, word in enumerate(["[UNK]"] + words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]"
+    ), words
+
+
+def test_run_ingest_chunks_while_encoder_truncates(fast_tokenizer):
+    # The encoder tokenizes with truncation on the same tokenizer the producer
+    # chunks with; every transcript must still be chunked to its last token.
+    tokenizer, words = fast_tokenizer
+    rng = random.Random(0)
+    records = [(str(i), " ".join(rng.choices(words, k=2000))) for i in range(40)]
+
+    def encode(texts):
+        token_lengths(texts, tokenizer, max_length=8)
+        return np.zeros((len(texts), 4), np.float32)
+
+    uploaded = {}
+
+    def upload(ids, documents, embeddings):
+        uploaded.update(zip(ids, documents))
+
+    chunks = (
+        (chunk.id, chunk.text)
+        for chunk in iter_chunks(records, tokenizer_spans(tokenizer), 64, overlap=8)
+    )
+    run_ingest(chunks, encode, upload, batch_size=8, verbose=False)
+
+    last = {}
+    for chunk_id, text in uploaded.items():
+        n = int(chunk_id.rsplit("::", 1)[1])
+        if n >= last.get(parent_id(chunk_id), (-1, ""))[0]:
+            last[parent_id(chunk_id)] = (n, text)
+    assert set(last) == {id for id, _ in records}
+    for id, document in records:
+        assert document.endswith(last[id][1])
+        assert last[id][0] == 35  # 2000 tokens in windows of 64, stride 56
@@ -0,0 +1,28 @@
+import numpy as np
+from winnow.embeddings import matryoshka
+
+
+class FakeEncoder:
+    cache_key = "fake"
+
+    def __call__(self, texts):
+        rng = np.random.default_rng(len(texts))
+        return rng.normal(size=(len(texts), 16)).astype(np.float32)
+
+
+class FakeCache:
+    def embed(self, model_name, documents, encode):
+        return encode(documents)
+
+
+def test_sizes_above_native_are_reported(monkeypatch, capsys):
+    monkeypatch.setattr(matryoshka, "get_encoder", lambda *a, **kw: FakeEncoder())
+    monkeypatch.setattr(matryoshka, "embedding_cache", FakeCache())
+    ids = [str(i) for i in range(50)]
+    rows = matryoshka.dimension_sweep(
+        "fake", (ids, ids), ["q1", "q2"], dimensions=(64, 32, 8, 4), k=5, repeats=1
+    )
+    assert [row["dimensions"] for row in rows] == [16, 8, 4]
+    assert {row["native_dimensions"] for row in rows} == {16}
+    assert rows[0]["recall_vs_full"] == 1.0
+    assert "skipping 64, 32 (above the native 16 dimensions)" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+import pytest
+from winnow.rerankers import registry
+from winnow.rerankers.registry import RerankerRegistry
+
+CONFIGS = {name: {"model_name": name} for name in ("a", "b", "c")}
+MB = 1024**2
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    # Each fake model "uses" 40 MB; RSS is a counter the factory bumps.
+    used = {"bytes": 0}
+    monkeypatch.setattr(registry, "_memory_in_use", lambda: used["bytes"])
+
+    def factory(model_name, verbose):
+        used["bytes"] += 40 * MB
+        return object()
+
+    return factory
+
+
+def test_get_reuses_warm_instances(memory):
+    rankers = RerankerRegistry(CONFIGS, max_bytes=None, factory=memory)
+    assert rankers.get("a") is rankers.get("a")
+    assert rankers.loads == 1
+    with pytest.raises(KeyError):
+        rankers.get("missing")
+
+
+def test_lru_eviction_under_memory_budget(memory):
+    rankers = RerankerRegistry(CONFIGS, max_bytes=100 * MB, factory=memory)
+    rankers.get("a")
+    rankers.get("b")
+    rankers.get("a")  # b is now least recently used
+    rankers.get("c")
+    assert rankers.loaded == ["a", "c"]
+    assert rankers.memory_bytes == 80 * MB
+    # Reloading b makes room first, using the size measured last time.
+    rankers.get("b")
+    assert rankers.loaded == ["c", "b"]
+    assert rankers.loads == 4
+
+
+def test_evict_and_clear(memory):
+    rankers = RerankerRegistry(CONFIGS, max_bytes=None, factory=memory)
+    rankers.get("a")
+    rankers.get("b")
+    rankers.evict("a")
+    assert rankers.loaded == ["b"]
+    rankers.clear()
+    assert rankers.loaded == [] and rankers.memory_bytes == 0
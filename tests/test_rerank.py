@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from winnow.rerankers import rerank
+from winnow.rerankers.rerank import ranked_scores, rerank_options, rerank_queries
+
+
+class StubRanker:
+    """
+    Scores by document length and records each rank() call's size.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def rank(self, query, docs, doc_ids):
+        self.calls.append(len(docs))
+        return SimpleNamespace(
+            results=[
+                SimpleNamespace(
+                    document=SimpleNamespace(doc_id=id), score=float(len(doc)), rank=None
+                )
+                for id, doc in zip(doc_ids, docs)
+            ]
+        )
+
+
+def options(n, query=""):
+    return [(f"{query}c{i}", "x" * (i % 37 + 1)) for i in range(n)]
+
+
+def test_rerank_options_batches_and_keeps_top_k(monkeypatch):
+    ranker = StubRanker()
+    monkeypatch.setattr(rerank.reranker_registry, "get", lambda name: ranker)
+    top = rerank_options(options(150), "q", k=3, batch_size=64, cache=None)
+    assert ranker.calls == [64, 64, 22]
+    assert [score for _, score in top] == [37.0, 37.0, 37.0]
+    assert [id for id, _ in top] == ["c36", "c73", "c110"]
+
+
+def test_rerank_queries_fetches_the_ranker_once(monkeypatch):
+    ranker = StubRanker()
+    fetched = []
+    monkeypatch.setattr(
+        rerank.reranker_registry, "get", lambda name: fetched.append(name) or ranker
+    )
+    top = rerank_queries(
+        {"q1": options(10, "a"), "q2": options(5, "b")}, k=2, cache=None
+    )
+    assert fetched == ["bge"]
+    assert ranker.calls == [10, 5]
+    assert top == {
+        "q1": [("ac9", 10.0), ("ac8", 9.0)],
+        "q2": [("bc4", 5.0), ("bc3", 4.0)],
+    }
+
+
+def test_ranked_scores_handles_single_results_and_rank_only():
+    single = SimpleNamespace(document=SimpleNamespace(doc_id=3), score=0.5, rank=1)
+    assert ranked_scores(single) == [(3, 0.5)]
+    rank_only = SimpleNamespace(document=SimpleNamespace(doc_id=4), score=None, rank=2)
+    assert ranked_scores(rank_only) == [(4, -2.0)]
+    assert ranked_scores(rank_only, scored_only=True) == []
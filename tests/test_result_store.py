@@ -0,0 +1,49 @@
+from winnow.embeddings.result_store import ResultStore
+
+RESULTS = [
+    {
+        "query": "q1",
+        "match": ["a", "b", "c"],
+        "scores": [0.1, 0.2, 0.3],
+        "latency": 0.5,
+    },
+    {"query": "q2", "match": ["d"]},
+]
+
+
+def test_append_and_round_trip(tmp_path):
+    store = ResultStore(tmp_path)
+    assert store.completed_models() == set()
+    assert store.append("org/model-1.5", RESULTS) == 4
+    store.append("other", RESULTS[:1])
+    assert store.completed_models() == {"org/model-1.5", "other"}
+    results = {r[0]["model"]: r for r in store.to_results()}
+    assert results["org/model-1.5"] == [
+        {"query": "q1", "match": ["a", "b", "c"], "model": "org/model-1.5"},
+        {"query": "q2", "match": ["d"], "model": "org/model-1.5"},
+    ]
+
+
+def test_read_filters(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append("m1", RESULTS)
+    store.append("m2", RESULTS)
+    table = store.read(
+        models=["m2"], queries=["q1"], max_rank=2, columns=["id", "score"]
+    )
+    assert table.column_names == ["id", "score"]
+    assert table.column("id").to_pylist() == ["a", "b"]
+    assert store.read(models=["none"]).num_rows == 0
+
+
+def test_reappend_replaces_model(tmp_path):
+    store = ResultStore(tmp_path)
+    store.append("m", RESULTS)
+    store.append("m", RESULTS[1:])
+    assert store.read().num_rows == 1
+
+
+def test_empty_store(tmp_path):
+    store = ResultStore(tmp_path / "missing")
+    assert store.read().num_rows == 0
+    assert store.to_results() == []
@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import pytest
+from winnow.evaluation.retrieval_metrics import (
+    bootstrap_ci,
+    bootstrap_weights,
+    build_hits,
+    evaluate,
+)
+
+GROUND_TRUTH = {"q1": ["a", "b"], "q2": ["c"], "unlabelled": []}
+RESULTS = [
+    [
+        {"query": "q1", "match": ["a", "x", "b"], "model": "m"},
+        {"query": "q2", "match": ["x", "y", "c"], "model": "m"},
+    ],
+    [
+        {"query": "q1", "match": ["x"], "model": "short"},
+    ],
+]
+
+
+def test_build_hits_pads_short_and_missing_results():
+    models, queries, hits, n_relevant = build_hits(RESULTS, GROUND_TRUTH)
+    assert models == ["m", "short"]
+    assert queries == ["q1", "q2"]
+    assert hits.shape == (2, 2, 3)
+    assert hits[0].tolist() == [[True, False, True], [False, False, True]]
+    assert not hits[1].any()
+    assert n_relevant.tolist() == [2, 1]
+
+
+def test_evaluate_hand_checked_values():
+    m, short = evaluate(RESULTS, GROUND_TRUTH, ks=(1, 3))
+    assert m["queries"] == 2
+    assert m["recall@1"] == pytest.approx((1 / 2 + 0) / 2)
+    assert m["recall@3"] == pytest.approx(1.0)
+    assert m["precision@1"] == pytest.approx(0.5)
+    assert m["precision@3"] == pytest.approx((2 / 3 + 1 / 3) / 2)
+    assert m["mrr"] == pytest.approx((1 + 1 / 3) / 2)
+    # q1: hits at ranks 1 and 3 of 2 relevant; q2: hit at rank 3 of 1 relevant.
+    ndcg_q1 = (1 + 1 / math.log2(4)) / (1 + 1 / math.log2(3))
+    ndcg_q2 = (1 / math.log2(4)) / 1
+    assert m["ndcg@3"] == pytest.approx((ndcg_q1 + ndcg_q2) / 2)
+    assert m["ndcg@1"] == pytest.approx(0.5)
+    assert all(short[key] == 0.0 for key in ("recall@3", "mrr", "ndcg@3"))
+
+
+def test_bootstrap_weights_resample_every_query_count():
+    weights = bootstrap_weights(n_queries=7, n_resamples=50, seed=1)
+    assert weights.shape == (50, 7)
+    assert (weights.sum(axis=1) == 7).all()
+    assert (weights == bootstrap_weights(7, 50, seed=1)).all()
+
+
+def test_bootstrap_ci_brackets_the_mean():
+    rng = np.random.default_rng(0)
+    scores = rng.random((3, 40))
+    low, high = bootstrap_ci(scores, bootstrap_weights(40, 500)).T
+    means = scores.mean(axis=1)
+    assert (low <= means).all() and (means <= high).all()
+    # A constant score has no spread to resample.
+    constant = bootstrap_ci(np.full((1, 40), 0.5), bootstrap_weights(40, 100))
+    assert constant.tolist() == [[0.5, 0.5]]
+
+
+def test_evaluate_reports_intervals():
+    (row, _) = evaluate(RESULTS, GROUND_TRUTH, ks=(3,), n_resamples=200)
+    low, high = row["recall@3_ci"]
+    assert low <= row["recall@3"] <= high
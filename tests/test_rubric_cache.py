@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from winnow.evaluation.curation_rubric.rubric_cache import RubricCache, rubric_key
+
+
+class Rubric(BaseModel):
+    score: int
+    rationale: str
+
+
+class RubricV2(BaseModel):
+    score: int
+    rationale: str
+    confidence: float = 1.0
+
+
+VARIABLES = {"curation_title": "Python", "tocs": ["Intro", "Lists"]}
+
+
+def test_key_changes_with_everything_that_changes_the_result():
+    key = rubric_key("template", VARIABLES, "gpt-4o", Rubric)
+    reordered = dict(reversed(VARIABLES.items()))
+    assert key == rubric_key("template", reordered, "gpt-4o", Rubric)
+    edited = {**VARIABLES, "tocs": ["Intro"]}
+    assert key != rubric_key("template", edited, "gpt-4o", Rubric)
+    assert key != rubric_key("template edited", VARIABLES, "gpt-4o", Rubric)
+    assert key != rubric_key("template", VARIABLES, "llama3.1:latest", Rubric)
+    assert key != rubric_key("template", VARIABLES, "gpt-4o", RubricV2)
+
+
+def test_round_trip_and_hit_counts(tmp_path):
+    cache = RubricCache(tmp_path / "rubrics.db")
+    key = rubric_key("template", VARIABLES, "gpt-4o", Rubric)
+    assert cache.get(key, Rubric) is None
+    cache.put(key, "gpt-4o", Rubric(score=4, rationale="clear"))
+    assert cache.get(key, Rubric) == Rubric(score=4, rationale="clear")
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Persisted: a new instance over the same file sees it.
+    assert RubricCache(tmp_path / "rubrics.db").get(key, Rubric).score == 4
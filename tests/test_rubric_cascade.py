@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("kramer")
+pytest.importorskip("conduit")
+
+from winnow.evaluation.curation_rubric import rubric_cascade  # noqa: E402
+from winnow.evaluation.curation_rubric.curation_rubric import (  # noqa: E402
+    CurationEvaluation,
+    CurationRubric,
+)
+from winnow.evaluation.curation_rubric.rubric_cache import RubricCache  # noqa: E402
+from winnow.evaluation.curation_rubric.rubric_cascade import (  # noqa: E402
+    needs_escalation,
+    score_dimension_cascade,
+    tier_counts,
+)
+
+CURATION = SimpleNamespace(title="Python", duration=60, TOCs=["Intro"])
+
+
+@pytest.fixture
+def judge(monkeypatch):
+    """
+    Fake score_dimension: the cheap model returns queued scores (or raises), the
+    expensive one always says 5. Records which models were asked.
+    """
+    calls = []
+    cheap_scores = []
+
+    def score_dimension(template, curation, model, verbose=False, cache=None):
+        calls.append(model)
+        if model == "cheap":
+            score = cheap_scores.pop(0)
+            if isinstance(score, Exception):
+                raise score
+        else:
+            score = 5
+        return CurationRubric(dimension="d", score=score, rationale=model)
+
+    monkeypatch.setattr(rubric_cascade, "score_dimension", score_dimension)
+    return calls, cheap_scores
+
+
+def score(cache=None):
+    return score_dimension_cascade(
+        "template", CURATION, "expensive", cache=cache, cheap_model="cheap", samples=3
+    )
+
+
+def test_needs_escalation():
+    assert not needs_escalation([1, 1, 2], (2.5, 3.5), 1)
+    assert needs_escalation([3, 3, 3], (2.5, 3.5), 1)
+    assert needs_escalation([1, 5, 5], (2.5, 3.5), 1)  # disagreement
+
+
+def test_clear_cheap_verdict_stays_cheap(judge):
+    calls, cheap_scores = judge
+    cheap_scores.extend([4, 5, 4])
+    result = score()
+    assert (result.tier, result.score) == ("cheap", 4)
+    assert result.cheap_scores == [4, 5, 4]
+    assert calls == ["cheap"] * 3
+
+
+def test_uncertain_verdict_escalates(judge):
+    calls, cheap_scores = judge
+    cheap_scores.extend([3, 3, 2])
+    result = score()
+    assert (result.tier, result.score) == ("expensive", 5)
+    assert calls == ["cheap"] * 3 + ["expensive"]
+
+
+def test_cheap_failure_falls_back_and_isnt_cached(judge, tmp_path):
+    calls, cheap_scores = judge
+    cache = RubricCache(tmp_path / "rubrics.db")
+    cheap_scores.extend([4, RuntimeError("ollama down")])
+    result = score(cache)
+    assert (result.tier, result.score) == ("fallback", 5)
+    assert "ollama down" in result.cheap_error
+    # The next run tries the cheap tier again.
+    cheap_scores.extend([4, 4, 4])
+    assert score(cache).tier == "cheap"
+    assert score(cache).tier == "cheap"  # now served from the cache
+    assert calls.count("cheap") == 5
+
+
+def test_tier_counts():
+    rubrics = [
+        rubric_cascade.TieredRubric(dimension="d", score=4, rationale="r", tier=tier)
+        for tier in ("cheap", "cheap", "fallback")
+    ]
+    evaluations = [
+        CurationEvaluation(title="c", rubrics=rubrics),
+        CurationEvaluation(
+            title="plain",
+            rubrics=[CurationRubric(dimension="d", score=1, rationale="r")],
+        ),
+    ]
+    assert tier_counts(evaluations) == {"cheap": 2, "fallback": 1, "expensive": 1}
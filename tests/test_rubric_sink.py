@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("kramer")
+pytest.importorskip("conduit")
+
+from winnow.evaluation.curation_rubric.curation_rubric import (  # noqa: E402
+    CurationRubric,
+    JsonlSink,
+    RubricResult,
+)
+
+
+def result(cert, dimension, score=None, error=None):
+    rubric = (
+        CurationRubric(dimension=dimension, score=score, rationale="r")
+        if score is not None
+        else None
+    )
+    return RubricResult(
+        cert=cert, cert_index=0, dimension=dimension, rubric=rubric, error=error
+    )
+
+
+def test_sink_round_trip_and_completed(tmp_path):
+    sink = JsonlSink(tmp_path / "results.jsonl")
+    assert sink.read() == [] and sink.completed() == set()
+    sink.write(result("c1", "dimension1", score=4))
+    sink.write(result("c1", "dimension2", error="timeout"))
+    sink.write(result("c2", "dimension1", score=2))
+    assert [r.rubric.score for r in sink.read() if r.rubric] == [4, 2]
+    assert sink.completed() == {("c1", "dimension1"), ("c2", "dimension1")}
+
+
+def test_sink_survives_a_truncated_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = JsonlSink(path)
+    sink.write(result("c1", "dimension1", score=4))
+    with open(path, "a") as f:
+        f.write('{"cert": "c2", "cert_ind')  # crash mid-write
+    sink.write(result("c3", "dimension1", score=5))
+    assert sink.completed() == {("c1", "dimension1"), ("c3", "dimension1")}
+
+
+def test_sink_keeps_tiered_rubric_fields(tmp_path):
+    from winnow.evaluation.curation_rubric.rubric_cascade import TieredRubric
+
+    sink = JsonlSink(tmp_path / "results.jsonl")
+    rubric = TieredRubric(
+        dimension="dimension1",
+        score=3,
+        rationale="r",
+        tier="fallback",
+        cheap_scores=[2, 4],
+        cheap_error="RuntimeError('down')",
+    )
+    sink.write(
+        RubricResult(cert="c1", cert_index=0, dimension="dimension1", rubric=rubric)
+    )
+    assert '"tier":"fallback"' in sink.path.read_text()
+    (read,) = sink.read(rubric_schema=TieredRubric)
+    assert read.rubric == rubric
+    (plain,) = sink.read()
+    assert type(plain.rubric).__name__ == "CurationRubric"
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+import pytest
+from winnow.rerankers import rerank
+from winnow.rerankers.rerank import rerank_options, score_options
+from winnow.rerankers.score_cache import ScoreCache, ranker_key
+
+
+class StubRanker:
+    """
+    Scores by document length; rank_only leaves scores empty like rankllm.
+    """
+
+    def __init__(self, rank_only=False):
+        self.rank_only = rank_only
+        self.calls = []
+
+    def rank(self, query, docs, doc_ids):
+        self.calls.append(list(docs))
+        order = sorted(range(len(docs)), key=lambda i: -len(docs[i]))
+        results = [
+            SimpleNamespace(
+                document=SimpleNamespace(doc_id=doc_ids[i]),
+                score=None if self.rank_only else float(len(docs[i])),
+                rank=rank + 1,
+            )
+            for rank, i in enumerate(order)
+        ]
+        return SimpleNamespace(results=results)
+
+
+OPTIONS = [(f"c{n}", "x" * n) for n in range(1, 8)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ScoreCache(tmp_path / "scores.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_get_many_and_put_many(cache):
+    cache.put_many("r", "q", {"d1": 0.5, "d2": 0.25})
+    found = cache.get_many("r", "q", ["d1", "d2", "d3", "d1"])
+    assert found == {"d1": 0.5, "d2": 0.25}
+    assert cache.get_many("r", "other query", ["d1"]) == {}
+    assert cache.get_many("other ranker", "q", ["d1"]) == {}
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert len(cache) == 2
+
+
+def test_ranker_key_ignores_api_key():
+    config = {"model_name": "cohere", "lang": "en"}
+    assert ranker_key({**config, "api_key": "a"}) == ranker_key(
+        {**config, "api_key": "b"}
+    )
+    assert ranker_key(config) != ranker_key({**config, "lang": "de"})
+
+
+def test_score_options_only_scores_misses(cache):
+    ranker = StubRanker()
+    first = score_options(ranker, OPTIONS[:4], "q", 2, cache, "stub")
+    second = score_options(ranker, OPTIONS, "q", 2, cache, "stub")
+    assert [len(batch) for batch in ranker.calls] == [2, 2, 2, 1]
+    assert dict(second) == {id: float(len(doc)) for id, doc in OPTIONS}
+    assert dict(first).items() <= dict(second).items()
+
+
+def test_rank_only_scores_are_not_cached(cache):
+    ranker = StubRanker(rank_only=True)
+    scored = score_options(ranker, OPTIONS, "q", None, cache, "stub")
+    assert max(scored, key=lambda x: x[1]) == ("c7", -1.0)
+    assert len(cache) == 0
+
+
+def test_listwise_rankers_get_one_batch(cache, monkeypatch):
+    ranker = StubRanker(rank_only=True)
+    monkeypatch.setattr(rerank.reranker_registry, "get", lambda name: ranker)
+    top = rerank_options(
+        OPTIONS, "q", k=2, model_name="rankllm", batch_size=3, cache=cache
+    )
+    assert [len(batch) for batch in ranker.calls] == [len(OPTIONS)]
+    assert [id for id, _ in top] == ["c7", "c6"]
+    assert len(cache) == 0
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+from winnow.embeddings.titles import TitleResolver, bulk_lookup
+
+COURSES = [
+    SimpleNamespace(course_admin_id=1, course_title="Intro to Python"),
+    SimpleNamespace(course_admin_id=2, title="Excel Basics"),
+    SimpleNamespace(course_admin_id=3),  # no title attribute
+]
+
+
+def test_from_courses_sends_leftovers_to_fallback_in_one_call():
+    calls = []
+
+    def fallback(ids):
+        calls.append(ids)
+        return {id: f"looked up {id}" for id in ids if id != "9"}
+
+    titles = TitleResolver.from_courses(COURSES, fallback=fallback)
+    assert titles.resolve([1, 2, 3, 4, 9, 1]) == {
+        "1": "Intro to Python",
+        "2": "Excel Basics",
+        "3": "looked up 3",
+        "4": "looked up 4",
+        "9": None,
+    }
+    assert calls == [["3", "4", "9"]]
+    # Everything, including the unknown id, is cached now.
+    assert titles.resolve(["9", "4"]) == {"9": None, "4": "looked up 4"}
+    assert len(calls) == 1 and titles.fetches == 1
+
+
+def test_from_courses_without_fallback():
+    titles = TitleResolver.from_courses(COURSES)
+    assert titles[1] == "Intro to Python"
+    assert titles[3] is None
+
+
+def test_bulk_lookup_skips_failures():
+    def get_title(id):
+        if id == 2:
+            raise LookupError(id)
+        return f"course {id}"
+
+    assert bulk_lookup(get_title)(["1", "2", "3"]) == {"1": "course 1", "3": "course 3"}
+
+
+def test_lru_eviction_and_fetch_errors():
+    fetched = []
+
+    def fetch_many(ids):
+        fetched.extend(ids)
+        if "bad" in ids:
+            raise ConnectionError("down")
+        return {id: id.upper() for id in ids}
+
+    titles = TitleResolver(fetch_many, maxsize=2)
+    titles.resolve(["a", "b"])
+    titles.resolve(["a", "c"])  # evicts b
+    assert titles.resolve(["b"]) == {"b": "B"}
+    assert fetched == ["a", "b", "c", "b"]
+    # A failed fetch isn't cached, so it's retried next time.
+    assert titles.resolve(["bad"]) == {"bad": None}
+    titles.resolve(["bad"])
+    assert fetched.count("bad") == 2